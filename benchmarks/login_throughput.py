@@ -0,0 +1,64 @@
+"""Login throughput and event loop stalls under concurrent password checks.
+
+Runs ``--logins`` bcrypt verifications, ``--concurrency`` at a time, first
+inline on the event loop (as the login handler used to) and then through
+``verify_password``. A heartbeat task measures how long the loop is blocked.
+
+    python -m benchmarks.login_throughput --logins 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import time
+
+from src.auth.utils import passwd_context, verify_password
+
+HEARTBEAT = 0.01
+
+
+async def heartbeat(stalls: list) -> None:
+    while True:
+        started = time.perf_counter()
+        await asyncio.sleep(HEARTBEAT)
+        stalls.append(time.perf_counter() - started - HEARTBEAT)
+
+
+async def inline_verify(password: str, hash_password: str) -> bool:
+    return passwd_context.verify(password, hash_password)
+
+
+async def run(check, logins: int, concurrency: int, hash_password: str) -> None:
+    limit = asyncio.Semaphore(concurrency)
+    stalls: list = []
+
+    async def login() -> None:
+        async with limit:
+            assert await check("benchmark", hash_password)
+
+    beat = asyncio.create_task(heartbeat(stalls))
+    await asyncio.sleep(0)
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    elapsed = time.perf_counter() - started
+    # Let the heartbeat report a stall that lasted until the very end.
+    await asyncio.sleep(HEARTBEAT * 2)
+    beat.cancel()
+
+    print(
+        f"{check.__name__:>16}: {logins / elapsed:7.1f} logins/s, "
+        f"worst loop stall {max(stalls, default=0) * 1000:7.1f} ms"
+    )
+
+
+async def main(logins: int, concurrency: int) -> None:
+    hash_password = passwd_context.hash("benchmark")
+    for check in (inline_verify, verify_password):
+        await run(check, logins, concurrency, hash_password)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.concurrency))
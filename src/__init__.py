@@ -1,11 +1,18 @@
+import asyncio
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import Depends, FastAPI
+from prometheus_client import make_asgi_app
 
+from src.auth.revocations import revocation_cache
 from src.auth.routes import auth_router
 from src.books.routes import book_router
+from src.books.search import init_search_index
+from src.books.suggest import suggest_index
+from src.config import Config
 from src.database.main import initdb
 from src.errors import register_error_handlers
+from src.ratelimit import api_rate_limit
 from src.reviews.routes import review_router
 from src.tags.routes import tags_router
 
@@ -27,7 +34,15 @@ This REST API is able to;
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await initdb()
+    await init_search_index()
+    await suggest_index.rebuild()
+    suggest_refresh = asyncio.create_task(
+        suggest_index.refresh_periodically(Config.SUGGEST_REBUILD_INTERVAL)
+    )
+    revocations = asyncio.create_task(revocation_cache.listen())
     yield
+    suggest_refresh.cancel()
+    revocations.cancel()
     print("server is stopping")
 
 
@@ -49,7 +64,27 @@ app = FastAPI(
 register_error_handlers(app)
 register_middleware(app)
 
-app.include_router(book_router, prefix=f"{version_prefix}/books", tags=["books"])
+# Every book, review and tag route requires a token, so they are limited per
+# user; the auth routes carry their own per-IP limits.
+rate_limited = [Depends(api_rate_limit)]
+
+app.include_router(
+    book_router,
+    prefix=f"{version_prefix}/books",
+    tags=["books"],
+    dependencies=rate_limited,
+)
 app.include_router(auth_router, prefix=f"{version_prefix}/auth", tags=["auth"])
-app.include_router(review_router, prefix=f"{version_prefix}/reviews", tags=["reviews"])
-app.include_router(tags_router, prefix=f"{version_prefix}/tags", tags=["tags"])
+app.include_router(
+    review_router,
+    prefix=f"{version_prefix}/reviews",
+    tags=["reviews"],
+    dependencies=rate_limited,
+)
+app.include_router(
+    tags_router,
+    prefix=f"{version_prefix}/tags",
+    tags=["tags"],
+    dependencies=rate_limited,
+)
+app.mount("/metrics", make_asgi_app())
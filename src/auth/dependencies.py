@@ -1,3 +1,4 @@
+import uuid
 from typing import Any, List, Optional
 from abc import abstractmethod
 
@@ -7,16 +8,18 @@ from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.database.main import get_session
 from src.database.models import User
-from src.database.redis import token_in_blocklist
 from src.errors import (
     AccessTokenError,
     AccountNotVerifiedError,
     InsufficientPermissionsError,
     InvalidTokenError,
     RefreshTokenError,
+    RevokedTokenError,
     UserNotFoundError,
 )
 
+from .revocations import revocation_cache
+from .schemas import PrincipalModel
 from .service import UserService
 from .utils import decode_token
 
@@ -28,29 +31,33 @@ class TokenBearer(HTTPBearer):
         super().__init__(auto_error=auto_error)
 
     async def __call__(self, request: Request) -> Any:
-        creds = await super().__call__(request)
-
-        assert creds
-        token = creds.credentials
-        token_data = decode_token(token)
+        # Several bearers can guard one request (the route's own and the one
+        # behind RoleChecker); the token is verified by the first of them.
+        token_data = getattr(request.state, "token_data", None)
 
         if token_data is None:
-            raise InvalidTokenError()
+            creds = await super().__call__(request)
 
-        if await token_in_blocklist(token_data["jti"]):
-            raise InvalidTokenError()
+            assert creds
+            token_data = decode_token(creds.credentials)
 
-        if not self.token_valid(token):
-            raise InvalidTokenError()
+            if token_data is None:
+                raise InvalidTokenError()
 
-        self.verify_token_data(token_data)
+            # Changing a user's role, verification or password bumps their
+            # epoch, which retires every token issued before it. A token can
+            # carry an epoch this worker has not heard of yet.
+            revoked, epoch = await revocation_cache.state(
+                token_data["jti"], token_data["user"]["user_uid"]
+            )
+            if revoked or token_data.get("epoch", 0) < epoch:
+                raise RevokedTokenError()
 
-        return token_data
+            request.state.token_data = token_data
 
-    def token_valid(self, token: str) -> bool:
-        token_data = decode_token(token)
+        self.verify_token_data(token_data)
 
-        return token_data is not None
+        return token_data
 
     @abstractmethod
     def verify_token_data(self, token_data): ...
@@ -81,11 +88,39 @@ async def get_current_active_user(
     raise UserNotFoundError()
 
 
+async def get_current_principal(
+    token_details: dict = Depends(AccessTokenBearer()),
+    session: AsyncSession = Depends(get_session),
+) -> PrincipalModel:
+    user_data = token_details.get("user", {})
+    try:
+        user_uid = uuid.UUID(user_data["user_uid"])
+    except ValueError:
+        raise UserNotFoundError()
+
+    if "role" in user_data and "is_verified" in user_data:
+        return PrincipalModel(
+            uid=user_uid,
+            email=user_data["email"],
+            role=user_data["role"],
+            is_verified=user_data["is_verified"],
+        )
+
+    # Tokens issued before the claims were added.
+    principal = await user_service.get_principal(user_uid, session)
+
+    if principal:
+        return principal
+    raise UserNotFoundError()
+
+
 class RoleChecker:
     def __init__(self, allowed_roles: List[str]):
         self.allowed_roles = allowed_roles
 
-    def __call__(self, current_user: User = Depends(get_current_active_user)) -> bool:
+    def __call__(
+        self, current_user: PrincipalModel = Depends(get_current_principal)
+    ) -> bool:
         if not current_user.is_verified:
             raise AccountNotVerifiedError()
         if current_user.role in self.allowed_roles:
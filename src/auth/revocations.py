@@ -0,0 +1,126 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Dict, Tuple
+
+from redis.exceptions import RedisError
+
+from src.database import redis as redis_store
+
+# How long a broken subscription waits before reconnecting.
+RETRY_DELAY = 1.0
+SWEEP_INTERVAL = 60
+BOOTSTRAP_BATCH_SIZE = 1000
+
+
+class RevocationCache:
+    """Per-worker mirror of the JTI blocklist and the users' token epochs.
+
+    ``listen`` subscribes to ``REVOCATIONS_CHANNEL`` before loading the
+    current keys, so no revocation falls between the two. While the
+    subscription is up, token checks are answered from memory; whenever it is
+    down they go back to reading Redis.
+    """
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+        self._epochs: Dict[str, int] = {}
+        self.synced = False
+
+    async def state(self, jti: str, user_uid: str) -> Tuple[bool, int]:
+        if not self.synced:
+            return await redis_store.token_state(jti, user_uid)
+
+        expires_at = self._revoked.get(jti)
+        revoked = expires_at is not None and expires_at > time.monotonic()
+        return revoked, self._epochs.get(user_uid, 0)
+
+    def apply(self, message: dict) -> None:
+        if "jti" in message:
+            self._revoked[message["jti"]] = time.monotonic() + message["ttl"]
+        else:
+            # A bump can arrive both in the bootstrap and on the channel.
+            user_uid = message["user_uid"]
+            self._epochs[user_uid] = max(
+                self._epochs.get(user_uid, 0), message["epoch"]
+            )
+
+    async def listen(self) -> None:
+        while True:
+            try:
+                async with redis_store.redis_client.pubsub() as pubsub:
+                    await pubsub.subscribe(redis_store.REVOCATIONS_CHANNEL)
+                    await self._bootstrap()
+                    self.synced = True
+                    swept_at = time.monotonic()
+
+                    while True:
+                        message = await pubsub.get_message(
+                            ignore_subscribe_messages=True, timeout=1.0
+                        )
+                        if message is not None:
+                            self.apply(json.loads(message["data"]))
+                        if time.monotonic() - swept_at > SWEEP_INTERVAL:
+                            self._sweep()
+                            swept_at = time.monotonic()
+            except (RedisError, OSError) as e:
+                logging.warning(f"Token revocations unavailable: {e}")
+            finally:
+                self.synced = False
+
+            await asyncio.sleep(RETRY_DELAY)
+
+    async def _bootstrap(self) -> None:
+        revoked: Dict[str, float] = {}
+        epochs: Dict[str, int] = {}
+
+        keys = [
+            key
+            async for key in redis_store.redis_client.scan_iter(
+                match=f"{redis_store.BLOCKLIST_PREFIX}:*", count=BOOTSTRAP_BATCH_SIZE
+            )
+        ]
+        for start in range(0, len(keys), BOOTSTRAP_BATCH_SIZE):
+            batch = keys[start : start + BOOTSTRAP_BATCH_SIZE]
+            async with redis_store.redis_client.pipeline(transaction=False) as pipe:
+                for key in batch:
+                    pipe.ttl(key)
+                ttls = await pipe.execute()
+            now = time.monotonic()
+            for key, ttl in zip(batch, ttls):
+                if ttl > 0:
+                    revoked[key.decode().split(":", 1)[1]] = now + ttl
+
+        keys = [
+            key
+            async for key in redis_store.redis_client.scan_iter(
+                match=f"{redis_store.TOKEN_EPOCH_PREFIX}:*", count=BOOTSTRAP_BATCH_SIZE
+            )
+        ]
+        for start in range(0, len(keys), BOOTSTRAP_BATCH_SIZE):
+            batch = keys[start : start + BOOTSTRAP_BATCH_SIZE]
+            values = await redis_store.redis_client.mget(batch)
+            for key, value in zip(batch, values):
+                if value is not None:
+                    epochs[key.decode().split(":", 1)[1]] = int(value)
+
+        # Revocations published while loading wait on the subscription. What
+        # an earlier subscription saw stays: revocations only expire and
+        # epochs only grow.
+        for jti, expires_at in self._revoked.items():
+            revoked[jti] = max(revoked.get(jti, 0), expires_at)
+        for user_uid, epoch in self._epochs.items():
+            epochs[user_uid] = max(epochs.get(user_uid, 0), epoch)
+        self._revoked, self._epochs = revoked, epochs
+
+    def _sweep(self) -> None:
+        now = time.monotonic()
+        self._revoked = {
+            jti: expires_at
+            for jti, expires_at in self._revoked.items()
+            if expires_at > now
+        }
+
+
+revocation_cache = RevocationCache()
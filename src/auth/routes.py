@@ -1,6 +1,6 @@
 from datetime import datetime, timedelta
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
@@ -8,9 +8,11 @@ from src.auth.utils import generate_password_hash
 from src.celery_tasks import send_email
 from src.config import Config
 from src.database.main import get_session
-from src.database.redis import add_jti_to_block_list
+from src.database.redis import add_jti_to_block_list, get_token_epoch
 from src.errors import (InvalidCredentialsError, InvalidTokenError,
                         UserAlreadyExistsError, UserNotFoundError)
+from src.ratelimit import (client_ip, login_account_rate_limit,
+                           login_rate_limit, mail_rate_limit)
 
 from .dependencies import (AccessTokenBearer, RefreshTokenBearer, RoleChecker,
                            get_current_active_user)
@@ -19,7 +21,7 @@ from .schemas import (EmailModel, PasswordResetConfirmModel,
                       UserCreateModel, UserLoginModel)
 from .service import UserService
 from .utils import (create_access_token, create_url_safe_token,
-                    decode_url_safe_token, verify_password)
+                    decode_url_safe_token, verify_and_update_password)
 
 auth_router = APIRouter()
 user_service = UserService()
@@ -29,7 +31,11 @@ role_checker = RoleChecker(["admin"])
 REFRESH_TOKEN_EXPIRY = 2
 
 
-@auth_router.post("/signup", status_code=status.HTTP_201_CREATED)
+@auth_router.post(
+    "/signup",
+    status_code=status.HTTP_201_CREATED,
+    dependencies=[Depends(mail_rate_limit)],
+)
 async def create_user_account(
     user_data: UserCreateModel,
     session: AsyncSession = Depends(get_session),
@@ -60,27 +66,51 @@ async def create_user_account(
     }
 
 
-@auth_router.post("/login")
+@auth_router.post("/login", dependencies=[Depends(login_rate_limit)])
 async def login_user(
-    login_data: UserLoginModel, session: AsyncSession = Depends(get_session)
+    login_data: UserLoginModel,
+    request: Request,
+    session: AsyncSession = Depends(get_session),
 ):
     email = login_data.email
     password = login_data.password
 
+    # Before the password is hashed, so guessing costs no bcrypt time.
+    await login_account_rate_limit.check(request, email.strip().lower())
+
+    # The epoch is read before the user row. Role and password changes bump
+    # it after committing, so one racing this login makes the new tokens
+    # stale instead of carrying the old claims under the new epoch.
+    user_uid = await user_service.get_user_uid_by_email(email, session)
+    if user_uid is None:
+        raise InvalidCredentialsError()
+    epoch = await get_token_epoch(str(user_uid))
+
     user = await user_service.get_user_by_email(email, session)
 
     if user:
-        password_is_valid = verify_password(password, user.password_hash)
+        password_is_valid, new_hash = await verify_and_update_password(
+            password, user.password_hash
+        )
 
         if password_is_valid:
-            access_token = create_access_token(
-                user_data={"email": user.email, "user_uid": str(user.uid)}
-            )
+            if new_hash:
+                await user_service.rehash_password(user, new_hash, session)
+
+            user_data = {
+                "email": user.email,
+                "user_uid": str(user.uid),
+                "role": user.role,
+                "is_verified": user.is_verified,
+            }
+
+            access_token = create_access_token(user_data=user_data, epoch=epoch)
 
             refresh_token = create_access_token(
-                user_data={"email": user.email, "user_uid": str(user.uid)},
+                user_data=user_data,
                 refresh=True,
                 expiry=timedelta(days=REFRESH_TOKEN_EXPIRY),
+                epoch=epoch,
             )
             return JSONResponse(
                 content={
@@ -98,7 +128,10 @@ async def get_new_access_token(token_details: dict = Depends(refresh_token_servi
     expiry_timestamp = token_details["exp"]
 
     if datetime.fromtimestamp(expiry_timestamp) > datetime.now():
-        new_access_token = create_access_token(user_data=token_details["user"])
+        # The refresh token passed the epoch check, so its claims are current.
+        new_access_token = create_access_token(
+            user_data=token_details["user"], epoch=token_details.get("epoch", 0)
+        )
 
         return JSONResponse(content={"access_token": new_access_token})
 
@@ -124,9 +157,11 @@ async def get_current_user(
 
 
 @auth_router.post("/send_mail")
-async def send_mail(emails: EmailModel):
+async def send_mail(emails: EmailModel, request: Request):
     emails_addrs = emails.addresses
 
+    await mail_rate_limit.check(request, client_ip(request), cost=len(emails_addrs))
+
     html = "<h1>Welcome to the App</h1>"
     subject = "Welcome to our app"
 
@@ -160,7 +195,9 @@ async def verify_user_account(token: str, session: AsyncSession = Depends(get_se
     )
 
 
-@auth_router.post("/password-reset-request")
+@auth_router.post(
+    "/password-reset-request", dependencies=[Depends(mail_rate_limit)]
+)
 async def password_reset_request(email_data: PasswordResetRequestModel):
     email = email_data.email
 
@@ -209,7 +246,7 @@ async def reset_account_password(
         if not user:
             raise UserNotFoundError()
 
-        password_hash = generate_password_hash(new_password)
+        password_hash = await generate_password_hash(new_password)
 
         await user_service.update_user(user, {"password_hash": password_hash}, session)
 
@@ -5,6 +5,7 @@ from typing import List
 from pydantic import BaseModel, EmailStr, Field
 
 from src.books.schemas import BookModel
+from src.config import Config
 
 
 class UserModel(BaseModel):
@@ -19,6 +20,13 @@ class UserModel(BaseModel):
     updated_at: datetime
 
 
+class PrincipalModel(BaseModel):
+    uid: uuid.UUID
+    email: EmailStr
+    role: str
+    is_verified: bool
+
+
 class UserCreateModel(BaseModel):
     first_name: str = Field(max_length=25)
     last_name: str = Field(max_length=25)
@@ -37,7 +45,7 @@ class UserBooksModel(UserModel):
 
 
 class EmailModel(BaseModel):
-    addresses: List[str]
+    addresses: List[str] = Field(min_length=1, max_length=Config.MAIL_RATE_BURST)
 
 
 class PasswordResetRequestModel(BaseModel):
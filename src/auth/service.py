@@ -1,12 +1,23 @@
+import uuid
+from typing import Optional
+
 from pydantic import EmailStr
 from sqlmodel import select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
+from src.cache import MISSING, LocalCache
+from src.config import Config
 from src.database.models import User
+from src.database.redis import bump_token_epoch
 
-from .schemas import UserCreateModel
+from .schemas import PrincipalModel, UserCreateModel
 from .utils import generate_password_hash
 
+# Fields that change what a principal is allowed to do.
+PRINCIPAL_FIELDS = {"role", "is_verified", "password_hash"}
+
+principal_cache = LocalCache(Config.PRINCIPAL_CACHE_MAXSIZE, Config.PRINCIPAL_CACHE_TTL)
+
 
 class UserService:
     async def get_user_by_email(self, email: EmailStr, session: AsyncSession):
@@ -16,6 +27,36 @@ class UserService:
 
         return result.first()
 
+    async def get_user_uid_by_email(
+        self, email: EmailStr, session: AsyncSession
+    ) -> Optional[uuid.UUID]:
+        result = await session.exec(select(User.uid).where(User.email == email))
+
+        return result.first()
+
+    async def get_principal(
+        self, user_uid: uuid.UUID, session: AsyncSession
+    ) -> Optional[PrincipalModel]:
+        principal = principal_cache.get(user_uid)
+        if principal is not MISSING:
+            return principal
+
+        statement = select(User.uid, User.email, User.role, User.is_verified).where(
+            User.uid == user_uid
+        )
+
+        result = await session.exec(statement)
+
+        row = result.first()
+
+        if row is None:
+            return None
+
+        # SQLModel types the row as a plain tuple.
+        principal = PrincipalModel.model_validate(row._mapping)  # type: ignore[attr-defined]
+        principal_cache.set(user_uid, principal)
+        return principal
+
     async def user_exists(self, email: str, session: AsyncSession):
         user = await self.get_user_by_email(email, session)
 
@@ -28,7 +69,9 @@ class UserService:
 
         new_user = User(**user_data_dict)
 
-        new_user.password_hash = generate_password_hash(user_data_dict["password"])
+        new_user.password_hash = await generate_password_hash(
+            user_data_dict["password"]
+        )
 
         session.add(new_user)
 
@@ -36,10 +79,27 @@ class UserService:
 
         return new_user
 
+    async def rehash_password(
+        self, user: User, password_hash: str, session: AsyncSession
+    ) -> User:
+        # Same password under the current cost factor: unlike update_user,
+        # this keeps the user's tokens valid.
+        user.password_hash = password_hash
+
+        await session.commit()
+
+        return user
+
     async def update_user(self, user: User, update_data: dict, session: AsyncSession):
         for key, value in update_data.items():
             setattr(user, key, value)
 
         await session.commit()
 
+        # Other workers pick the change up within PRINCIPAL_CACHE_TTL; tokens
+        # carrying the old claims are retired right away.
+        if PRINCIPAL_FIELDS & update_data.keys():
+            principal_cache.delete(user.uid)
+            await bump_token_epoch(str(user.uid))
+
         return user
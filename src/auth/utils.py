@@ -1,6 +1,8 @@
+import asyncio
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Union
+from typing import Optional, Tuple, Union
 
 import jwt
 from fastapi import HTTPException
@@ -8,27 +10,70 @@ from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
 from passlib.context import CryptContext
 
 from src.config import Config
+from src.metrics import password_hash_pending
 
-passwd_context = CryptContext(schemes=["bcrypt"])
+passwd_context = CryptContext(
+    schemes=["bcrypt"], bcrypt__rounds=Config.PASSWORD_HASH_ROUNDS
+)
+
+# bcrypt takes hundreds of milliseconds and releases the GIL, so it runs on
+# a few threads of its own instead of blocking the event loop. Jobs beyond
+# PASSWORD_HASH_WORKERS wait in the executor's queue.
+password_executor = ThreadPoolExecutor(
+    max_workers=Config.PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash"
+)
 
 
-def generate_password_hash(password: str) -> str:
-    hash_password = passwd_context.hash(password)
+async def _in_password_executor(func, *args):
+    password_hash_pending.inc()
+    try:
+        return await asyncio.get_running_loop().run_in_executor(
+            password_executor, func, *args
+        )
+    finally:
+        password_hash_pending.dec()
+
+
+async def generate_password_hash(password: str) -> str:
+    hash_password = await _in_password_executor(passwd_context.hash, password)
     return hash_password
 
 
-def verify_password(password: str, hash_password: str) -> bool:
-    return passwd_context.verify(password, hash_password)
+async def verify_password(password: str, hash_password: str) -> bool:
+    return await _in_password_executor(passwd_context.verify, password, hash_password)
+
+
+async def verify_and_update_password(
+    password: str, hash_password: str
+) -> Tuple[bool, Optional[str]]:
+    """Verify ``password`` and return a new hash to store, if any.
+
+    A new hash is returned when the stored one was made with another cost
+    factor than ``PASSWORD_HASH_ROUNDS``.
+    """
+    return await _in_password_executor(
+        passwd_context.verify_and_update, password, hash_password
+    )
 
 
 def create_access_token(
-    user_data: dict, expiry: Union[timedelta, None] = None, refresh: bool = False
+    user_data: dict,
+    expiry: Union[timedelta, None] = None,
+    refresh: bool = False,
+    epoch: int = 0,
 ) -> str:
+    """Sign a token for ``user_data``.
+
+    ``user_data`` carries the ``role`` and ``is_verified`` claims that role
+    checks trust; ``epoch`` is the user's token epoch at issue time, which
+    must still be current for the token to be accepted.
+    """
     payload = {
         "user": user_data,
         "exp": datetime.now() + (expiry if expiry else timedelta(minutes=60)),
         "jti": str(uuid.uuid4()),
         "refresh": refresh,
+        "epoch": epoch,
     }
 
     token = jwt.encode(payload, key=Config.JWT_SECRET, algorithm=Config.JWT_ALGORITHM)
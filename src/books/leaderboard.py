@@ -0,0 +1,210 @@
+import logging
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+
+from redis.exceptions import RedisError
+from sqlalchemy import func
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.books.schemas import LeaderboardBy, LeaderboardWindow
+from src.database import redis as redis_store
+from src.database.models import Book, Review
+
+PREFIX = "leaderboard"
+# Daily review-count buckets are kept long enough for the widest window.
+BUCKET_DAYS = 30
+# Windows are materialized from the daily buckets and reused for this long.
+WINDOW_TTL = 60
+REBUILD_BATCH_SIZE = 5000
+
+WINDOW_DAYS = {
+    LeaderboardWindow.DAY: 1,
+    LeaderboardWindow.WEEK: 7,
+    LeaderboardWindow.MONTH: 30,
+}
+
+
+def _all_time_key(by: LeaderboardBy) -> str:
+    return f"{PREFIX}:{by.value}"
+
+
+def _bucket_key(day: date) -> str:
+    return f"{PREFIX}:reviews:{day:%Y%m%d}"
+
+
+def _window_key(by: LeaderboardBy, window: LeaderboardWindow) -> str:
+    return f"{PREFIX}:{by.value}:{window.value}"
+
+
+def _recent_days(days: int) -> List[date]:
+    today = date.today()
+    return [today - timedelta(days=offset) for offset in range(days)]
+
+
+class Leaderboard:
+    """Top books by average rating and by review count, in Redis sorted sets.
+
+    All-time scores mirror the aggregates on ``books``. Review counts are also
+    bucketed per day; a window is the union of its daily buckets (and, for
+    ratings, its intersection with the all-time ratings), materialized for
+    ``WINDOW_TTL`` seconds so reads are a single ``ZREVRANGE``.
+    """
+
+    async def record(
+        self,
+        book_uid: uuid.UUID,
+        review_count: int,
+        avg_rating: float,
+        reviewed_on: date,
+        delta: int,
+    ) -> None:
+        member = str(book_uid)
+        try:
+            async with redis_store.redis_client.pipeline(transaction=False) as pipe:
+                if review_count > 0:
+                    pipe.zadd(_all_time_key(LeaderboardBy.RATING), {member: avg_rating})
+                    pipe.zadd(
+                        _all_time_key(LeaderboardBy.REVIEWS), {member: review_count}
+                    )
+                else:
+                    pipe.zrem(_all_time_key(LeaderboardBy.RATING), member)
+                    pipe.zrem(_all_time_key(LeaderboardBy.REVIEWS), member)
+
+                if date.today() - reviewed_on < timedelta(days=BUCKET_DAYS):
+                    bucket = _bucket_key(reviewed_on)
+                    pipe.zincrby(bucket, delta, member)
+                    pipe.zremrangebyscore(bucket, "-inf", 0)
+                    pipe.expire(bucket, timedelta(days=BUCKET_DAYS + 1))
+                await pipe.execute()
+        except RedisError as e:
+            logging.warning(f"Leaderboard unavailable: {e}")
+
+    async def remove(self, book_uids: Iterable[uuid.UUID]) -> None:
+        members = [str(uid) for uid in book_uids]
+        if not members:
+            return
+
+        keys = [_all_time_key(by) for by in LeaderboardBy]
+        keys += [_bucket_key(day) for day in _recent_days(BUCKET_DAYS)]
+        try:
+            async with redis_store.redis_client.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.zrem(key, *members)
+                await pipe.execute()
+        except RedisError as e:
+            logging.warning(f"Leaderboard unavailable: {e}")
+
+    async def top(
+        self, by: LeaderboardBy, window: LeaderboardWindow, limit: int
+    ) -> List[Tuple[uuid.UUID, float]]:
+        try:
+            if window == LeaderboardWindow.ALL:
+                key = _all_time_key(by)
+            else:
+                key = _window_key(by, window)
+                if not await redis_store.redis_client.exists(key):
+                    await self._materialize(window)
+
+            ranked = await redis_store.redis_client.zrevrange(
+                key, 0, limit - 1, withscores=True
+            )
+        except RedisError as e:
+            logging.warning(f"Leaderboard unavailable: {e}")
+            return []
+
+        return [(uuid.UUID(member.decode()), score) for member, score in ranked]
+
+    async def _materialize(self, window: LeaderboardWindow) -> None:
+        reviews = _window_key(LeaderboardBy.REVIEWS, window)
+        rating = _window_key(LeaderboardBy.RATING, window)
+        buckets = [_bucket_key(day) for day in _recent_days(WINDOW_DAYS[window])]
+
+        async with redis_store.redis_client.pipeline(transaction=True) as pipe:
+            pipe.zunionstore(reviews, buckets)
+            # Books reviewed in the window, scored by their overall average.
+            pipe.zinterstore(
+                rating, {_all_time_key(LeaderboardBy.RATING): 1, reviews: 0}
+            )
+            pipe.expire(reviews, WINDOW_TTL)
+            pipe.expire(rating, WINDOW_TTL)
+            await pipe.execute()
+
+    async def rebuild(self, session: AsyncSession) -> None:
+        """Reload every set from the database.
+
+        The live keys are replaced atomically.
+        """
+        staged: Dict[str, str] = {}
+
+        def stage(key: str) -> str:
+            staged.setdefault(key, f"{key}:rebuild")
+            return staged[key]
+
+        try:
+            await redis_store.redis_client.delete(
+                *[f"{key}:rebuild" for key in self._keys()]
+            )
+
+            statement = (
+                select(Book.uid, Book.review_count, Book.avg_rating)
+                .where(Book.review_count > 0)
+                .execution_options(yield_per=REBUILD_BATCH_SIZE)
+            )
+            result = await session.stream(statement)
+            async for partition in result.partitions():
+                async with redis_store.redis_client.pipeline(transaction=False) as pipe:
+                    pipe.zadd(
+                        stage(_all_time_key(LeaderboardBy.RATING)),
+                        {str(uid): avg_rating for uid, _, avg_rating in partition},
+                    )
+                    pipe.zadd(
+                        stage(_all_time_key(LeaderboardBy.REVIEWS)),
+                        {str(uid): count for uid, count, _ in partition},
+                    )
+                    await pipe.execute()
+
+            since = datetime.combine(_recent_days(BUCKET_DAYS)[-1], datetime.min.time())
+            reviewed_day = func.date(Review.created_at)
+            counts = (
+                select(reviewed_day, Review.book_uid, func.count(col(Review.uid)))
+                .where(Review.created_at >= since, col(Review.book_uid).is_not(None))
+                .group_by(reviewed_day, col(Review.book_uid))
+                .execution_options(yield_per=REBUILD_BATCH_SIZE)
+            )
+            result = await session.stream(counts)
+            async for partition in result.partitions():
+                async with redis_store.redis_client.pipeline(transaction=False) as pipe:
+                    for reviewed_on, book_uid, count in partition:
+                        pipe.zadd(
+                            stage(_bucket_key(_as_date(reviewed_on))),
+                            {str(book_uid): count},
+                        )
+                    await pipe.execute()
+
+            async with redis_store.redis_client.pipeline(transaction=True) as pipe:
+                for key in self._keys():
+                    if key in staged:
+                        pipe.rename(staged[key], key)
+                    else:
+                        pipe.delete(key)
+                for day in _recent_days(BUCKET_DAYS):
+                    pipe.expire(_bucket_key(day), timedelta(days=BUCKET_DAYS + 1))
+                for window in WINDOW_DAYS:
+                    pipe.delete(*[_window_key(by, window) for by in LeaderboardBy])
+                await pipe.execute()
+        except RedisError as e:
+            logging.warning(f"Leaderboard unavailable: {e}")
+
+    def _keys(self) -> List[str]:
+        keys = [_all_time_key(by) for by in LeaderboardBy]
+        return keys + [_bucket_key(day) for day in _recent_days(BUCKET_DAYS)]
+
+
+def _as_date(value) -> date:
+    # func.date() comes back as a date from Postgres and as text from SQLite.
+    return value if isinstance(value, date) else date.fromisoformat(value)
+
+
+leaderboard = Leaderboard()
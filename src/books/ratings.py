@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import math
+import time
+import uuid
+from typing import Callable, Dict, List, Optional, Union
+
+import numpy as np
+from sqlalchemy import delete, insert, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.database.main import Session, execute
+from src.database.models import Book, BookRatingCount, Review, table
+
+# Star values always present in a histogram, even with no reviews.
+RATING_VALUES = range(0, 6)
+PERCENTILES = (25, 50, 75, 90)
+LOAD_BATCH_SIZE = 50000
+
+UPSERTS: Dict[str, Callable[..., Union[postgresql.Insert, sqlite.Insert]]] = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def increment_rating_counts(dialect: str, rows: List[dict]):
+    """Upsert adding each row's ``count`` to the stored one.
+
+    Rows are ``{"book_uid", "rating", "count"}``.
+    """
+    counts = table(BookRatingCount)
+    statement = UPSERTS[dialect](counts).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=[counts.c.book_uid, counts.c.rating],
+        set_={"count": counts.c.count + statement.excluded.count},
+    )
+
+
+def decrement_rating_count(book_uid: uuid.UUID, rating: int):
+    return (
+        update(BookRatingCount)
+        .where(
+            col(BookRatingCount.book_uid) == book_uid,
+            col(BookRatingCount.rating) == rating,
+        )
+        .values(count=BookRatingCount.count - 1)
+    )
+
+
+def histogram(counts: Dict[int, int]) -> dict:
+    counts = {rating: counts.get(rating, 0) for rating in RATING_VALUES} | counts
+    ratings = sorted(counts)
+    total = sum(counts.values())
+
+    percentiles: Dict[str, int] = {}
+    if total:
+        # Nearest rank: the smallest rating covering p% of the reviews.
+        cumulative = np.cumsum([counts[rating] for rating in ratings])
+        for p in PERCENTILES:
+            position = int(np.searchsorted(cumulative, math.ceil(p / 100 * total)))
+            percentiles[f"p{p}"] = ratings[position]
+
+    return {
+        "total": total,
+        "average": sum(r * n for r, n in counts.items()) / total if total else 0.0,
+        "counts": [{"rating": rating, "count": counts[rating]} for rating in ratings],
+        "percentiles": percentiles,
+    }
+
+
+async def get_rating_histogram(book_uid: str, session: AsyncSession) -> Optional[dict]:
+    try:
+        uid = uuid.UUID(book_uid)
+    except ValueError:
+        return None
+
+    # One query answers both whether the book exists and its counts.
+    statement = (
+        select(Book.uid, BookRatingCount.rating, BookRatingCount.count)
+        .outerjoin(BookRatingCount, col(BookRatingCount.book_uid) == Book.uid)
+        .where(Book.uid == uid)
+    )
+
+    result = await session.exec(statement)
+
+    rows = result.all()
+    if not rows:
+        return None
+
+    return histogram({rating: count for _, rating, count in rows if rating is not None})
+
+
+async def rebuild_rating_counts(session: AsyncSession) -> int:
+    """Recount every book's histogram from ``reviews``.
+
+    The table is replaced in one transaction.
+    """
+    started = time.perf_counter()
+    index: Dict[uuid.UUID, int] = {}
+    books: List[np.ndarray] = []
+    ratings: List[np.ndarray] = []
+
+    statement = (
+        select(Review.book_uid, Review.rating)
+        .where(col(Review.book_uid).is_not(None))
+        .execution_options(yield_per=LOAD_BATCH_SIZE)
+    )
+    result = await session.stream(statement)
+    async for partition in result.partitions():
+        positions = (
+            index.setdefault(book_uid, len(index)) for book_uid, _ in partition
+        )
+        books.append(np.fromiter(positions, dtype=np.int64))
+        ratings.append(np.fromiter((r for _, r in partition), dtype=np.int64))
+
+    book_uids = list(index)
+    rows: List[dict] = []
+    if books:
+        book_positions = np.concatenate(books)
+        rating_values = np.concatenate(ratings)
+        low = int(rating_values.min())
+        width = int(rating_values.max()) - low + 1
+
+        # One bincount over (book, rating) cells counts every histogram.
+        counts = np.bincount(book_positions * width + (rating_values - low))
+        cells = np.flatnonzero(counts)
+        rows = [
+            {
+                "book_uid": book_uids[cell // width],
+                "rating": int(cell % width) + low,
+                "count": int(counts[cell]),
+            }
+            for cell in cells
+        ]
+
+    await execute(session, delete(BookRatingCount))
+    connection = await session.connection()
+    for start in range(0, len(rows), Config.BULK_CHUNK_SIZE):
+        await connection.execute(
+            insert(table(BookRatingCount)), rows[start : start + Config.BULK_CHUNK_SIZE]
+        )
+    await session.commit()
+
+    logging.info(
+        f"Rebuilt {len(rows)} rating counts for {len(book_uids)} books "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return len(rows)
+
+
+async def _rebuild() -> int:
+    async with Session() as session:
+        return await rebuild_rating_counts(session)
+
+
+if __name__ == "__main__":
+    # python -m src.books.ratings
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_rebuild())
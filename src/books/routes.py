@@ -1,26 +1,142 @@
-from typing import List
+import json
+from typing import Annotated, AsyncIterator, List, Optional, Set, Union
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.auth.dependencies import AccessTokenBearer, RoleChecker
-from src.books.schemas import BookCreateModel, BookModel, BookUpdateModel
+from src.books.ratings import get_rating_histogram
+from src.books.schemas import (
+    BookBulkDeleteModel,
+    BookBulkDeleteResultModel,
+    BookBulkUpdateModel,
+    BookBulkUpdateResultModel,
+    BookCreateModel,
+    BookFacetsModel,
+    BookFilterModel,
+    BookImportResultModel,
+    BookInclude,
+    BookModel,
+    BookPageModel,
+    BookRankingModel,
+    BookRatingsModel,
+    BookSort,
+    BookSuggestionModel,
+    BookUpdateModel,
+    LeaderboardBy,
+    LeaderboardWindow,
+)
 from src.books.service import BookService
+from src.books.suggest import suggest_index
+from src.config import Config
 from src.database.main import get_session
+from src.database.models import Book, table
 from src.errors import BookNotFoundError
+from src.etag import (
+    if_match_versions,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+    version_etag,
+)
+from src.export import MEDIA_TYPES, ExportFormat, export_rows
+from src.tags.service import TagService
 
 book_router = APIRouter()
 book_service = BookService()
+tag_service = TagService()
 role_checker = Depends(RoleChecker(["admin", "user"]))
+admin_role_checker = Depends(RoleChecker(["admin"]))
+
+
+class BookExpansion:
+    def __init__(
+        self,
+        include: Optional[str] = Query(
+            default=None, description="Comma separated relations: reviews,tags"
+        ),
+        reviews_limit: int = Query(default=5, ge=1, le=50),
+        tags_limit: int = Query(default=10, ge=1, le=50),
+    ):
+        self.include: Set[BookInclude] = set()
+        self.reviews_limit = reviews_limit
+        self.tags_limit = tags_limit
+
+        for name in (include or "").split(","):
+            if not name.strip():
+                continue
+            try:
+                self.include.add(BookInclude(name.strip()))
+            except ValueError:
+                raise HTTPException(
+                    detail=f"Cannot include '{name.strip()}'",
+                    status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                )
+
+    async def page_etag(
+        self, books: List[Book], next_cursor: Optional[str], session: AsyncSession
+    ) -> str:
+        # Book versions cover the embedded reviews; tags carry their own
+        # versions. Either way the page is validated before any relation is
+        # loaded.
+        tags = {}
+        if BookInclude.TAGS in self.include and books:
+            tags = await book_service.get_tag_versions(
+                [book.uid for book in books], session
+            )
+        return make_etag(
+            *(f"{book.uid}:{book.version}" for book in books),
+            *(
+                f"{book.uid}:{uid}:{version}"
+                for book in books
+                for uid, version in sorted(tags.get(book.uid, []))
+            ),
+            next_cursor,
+            sorted(include.value for include in self.include),
+            self.reviews_limit,
+            self.tags_limit,
+        )
+
 
+def book_filters(filters: Annotated[BookFilterModel, Query()]) -> BookFilterModel:
+    # FastAPI only expands a model into query parameters when it is the sole
+    # query parameter of its dependency.
+    return filters
 
-@book_router.get("/", response_model=List[BookModel], dependencies=[role_checker])
+
+@book_router.get(
+    "/",
+    response_model=BookPageModel,
+    response_model_exclude_unset=True,
+    dependencies=[role_checker],
+)
 async def get_all_books(
+    request: Request,
+    response: Response,
+    limit: int = Query(default=Config.DEFAULT_PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: BookSort = BookSort.NEWEST,
+    filters: BookFilterModel = Depends(book_filters),
+    expansion: BookExpansion = Depends(),
     session: AsyncSession = Depends(get_session),
     token_details: dict = Depends(AccessTokenBearer()),
 ):
-    books = await book_service.get_all_books(session)
-    return books
+    books, next_cursor = await book_service.get_all_books(
+        session, limit, cursor, sort, filters
+    )
+    etag = await expansion.page_etag(books, next_cursor, session)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers["ETag"] = etag
+    items = await book_service.expand_books(
+        books,
+        session,
+        expansion.include,
+        expansion.reviews_limit,
+        expansion.tags_limit,
+    )
+    return {"items": items, "next_cursor": next_cursor}
 
 
 @book_router.post(
@@ -40,28 +156,243 @@ async def create_a_book(
     return new_book
 
 
+async def _ndjson_rows(request: Request) -> AsyncIterator[bytes]:
+    buffer = b""
+    async for chunk in request.stream():
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield line
+    if buffer.strip():
+        yield buffer
+
+
+async def _json_array_rows(request: Request) -> AsyncIterator[Union[bytes, dict]]:
+    try:
+        rows = await request.json()
+    except json.JSONDecodeError:
+        raise HTTPException(
+            detail="Body must be a JSON array or NDJSON",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    if not isinstance(rows, list):
+        raise HTTPException(
+            detail="Body must be a JSON array or NDJSON",
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        )
+
+    for row in rows:
+        yield row if isinstance(row, dict) else json.dumps(row).encode()
+
+
+@book_router.post(
+    "/bulk", response_model=BookImportResultModel, dependencies=[role_checker]
+)
+async def import_books(
+    request: Request,
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(AccessTokenBearer()),
+):
+    user_uid = token_details.get("user", {})["user_uid"]
+    content_type = request.headers.get("content-type", "")
+
+    rows: AsyncIterator[Union[bytes, dict]]
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        rows = _ndjson_rows(request)
+    else:
+        rows = _json_array_rows(request)
+
+    return await book_service.import_books(
+        rows, user_uid, session, Config.BULK_CHUNK_SIZE, Config.BULK_MAX_ERRORS
+    )
+
+
+@book_router.get(
+    "/search",
+    response_model=BookPageModel,
+    response_model_exclude_unset=True,
+    dependencies=[role_checker],
+)
+async def search_books(
+    q: str = Query(min_length=1, max_length=200),
+    limit: int = Query(default=Config.DEFAULT_PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(AccessTokenBearer()),
+):
+    books, next_cursor = await book_service.search_books(q, session, limit, cursor)
+    return {
+        "items": [book.model_dump() for book in books],
+        "next_cursor": next_cursor,
+    }
+
+
+@book_router.get("/facets", response_model=BookFacetsModel, dependencies=[role_checker])
+async def book_facets(
+    filters: BookFilterModel = Depends(book_filters),
+    limit: int = Query(default=20, ge=1, le=100),
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(AccessTokenBearer()),
+):
+    return await book_service.get_facets(filters, limit, session)
+
+
+@book_router.get(
+    "/top", response_model=List[BookRankingModel], dependencies=[role_checker]
+)
+async def top_books(
+    by: LeaderboardBy = LeaderboardBy.RATING,
+    window: LeaderboardWindow = LeaderboardWindow.ALL,
+    limit: int = Query(default=10, ge=1, le=50),
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(AccessTokenBearer()),
+):
+    return await book_service.get_top_books(by, window, limit, session)
+
+
+@book_router.get(
+    "/suggest", response_model=List[BookSuggestionModel], dependencies=[role_checker]
+)
+async def suggest_books(
+    prefix: str = Query(min_length=1, max_length=100),
+    limit: int = Query(default=10, ge=1, le=50),
+    token_details: dict = Depends(AccessTokenBearer()),
+):
+    return suggest_index.suggest(prefix, limit)
+
+
+@book_router.get("/export", dependencies=[role_checker])
+async def export_books(
+    export_format: ExportFormat = Query(default=ExportFormat.NDJSON, alias="format"),
+    token_details: dict = Depends(AccessTokenBearer()),
+):
+    return StreamingResponse(
+        export_rows(
+            book_service.stream_books, list(table(Book).columns.keys()), export_format
+        ),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="books.{export_format.value}"'
+        },
+    )
+
+
 @book_router.get("/{book_uid}", response_model=BookModel, dependencies=[role_checker])
 async def get_book(
     book_uid: str,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_session),
     token_details: dict = Depends(AccessTokenBearer()),
 ):
-    book = await book_service.get_book(book_uid, session)
+    if request.headers.get("if-none-match"):
+        etag = await book_service.get_book_etag(book_uid, session)
+        if etag is not None and is_not_modified(request, etag):
+            return not_modified_response(etag)
+
+    book = await book_service.get_book_details(book_uid, session)
     if book:
+        book = await tag_service.with_current_tags(book, session)
+        response.headers["ETag"] = version_etag(
+            book.version, [(tag.uid, tag.version) for tag in book.tags]
+        )
         return book
     raise BookNotFoundError()
 
 
+@book_router.get(
+    "/{book_uid}/similar",
+    response_model=List[BookRankingModel],
+    dependencies=[role_checker],
+)
+async def get_similar_books(
+    book_uid: str,
+    limit: int = Query(default=Config.SIMILAR_BOOKS_K, ge=1, le=Config.SIMILAR_BOOKS_K),
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(AccessTokenBearer()),
+):
+    similar = await book_service.get_similar_books(book_uid, limit, session)
+    if similar is None:
+        raise BookNotFoundError()
+    return similar
+
+
+@book_router.get(
+    "/{book_uid}/ratings",
+    response_model=BookRatingsModel,
+    dependencies=[role_checker],
+)
+async def get_book_ratings(
+    book_uid: str,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(AccessTokenBearer()),
+):
+    ratings = await get_rating_histogram(book_uid, session)
+    if ratings is None:
+        raise BookNotFoundError()
+
+    etag = make_etag(*(f"{c['rating']}:{c['count']}" for c in ratings["counts"]))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers["ETag"] = etag
+
+    return ratings
+
+
+@book_router.patch(
+    "/bulk", response_model=BookBulkUpdateResultModel, dependencies=[role_checker]
+)
+async def update_books(
+    book_update_data: BookBulkUpdateModel,
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(AccessTokenBearer()),
+):
+    if not book_update_data.changes.model_fields_set:
+        raise HTTPException(
+            detail="No changes given", status_code=status.HTTP_422_UNPROCESSABLE_ENTITY
+        )
+
+    return await book_service.update_books(
+        book_update_data.uids, book_update_data.changes, session
+    )
+
+
+@book_router.delete(
+    "/bulk", response_model=BookBulkDeleteResultModel, dependencies=[admin_role_checker]
+)
+async def delete_books(
+    book_delete_data: BookBulkDeleteModel,
+    session: AsyncSession = Depends(get_session),
+    token_details: dict = Depends(AccessTokenBearer()),
+):
+    uids = list(dict.fromkeys(book_delete_data.uids))
+    deleted = set(await book_service.delete_books(uids, session))
+
+    return {
+        "deleted": [uid for uid in uids if uid in deleted],
+        "not_found": [uid for uid in uids if uid not in deleted],
+    }
+
+
 @book_router.patch("/{book_uid}", dependencies=[role_checker])
 async def update_book(
     book_uid: str,
     book_update_data: BookUpdateModel,
+    request: Request,
+    response: Response,
     session: AsyncSession = Depends(get_session),
     token_details: dict = Depends(AccessTokenBearer()),
 ) -> dict:
-    book = await book_service.update_book(book_uid, book_update_data, session)
+    book = await book_service.update_book(
+        book_uid, book_update_data, session, if_match_versions(request)
+    )
     if book:
-        return book.model_dump()
+        response.headers["ETag"] = version_etag(book["version"])
+        return book
     raise BookNotFoundError()
 
 
@@ -80,11 +411,34 @@ async def delete_book(
 
 
 @book_router.get(
-    "/user/{user_uid}", response_model=List[BookModel], dependencies=[role_checker]
+    "/user/{user_uid}",
+    response_model=BookPageModel,
+    response_model_exclude_unset=True,
+    dependencies=[role_checker],
 )
 async def get_user_book_submissions(
-    user_uid: str, session: AsyncSession = Depends(get_session)
+    user_uid: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(default=Config.DEFAULT_PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: BookSort = BookSort.NEWEST,
+    expansion: BookExpansion = Depends(),
+    session: AsyncSession = Depends(get_session),
 ):
-    books = await book_service.get_user_books(user_uid, session)
+    books, next_cursor = await book_service.get_user_books(
+        user_uid, session, limit, cursor, sort
+    )
+    etag = await expansion.page_etag(books, next_cursor, session)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers["ETag"] = etag
+    items = await book_service.expand_books(
+        books,
+        session,
+        expansion.include,
+        expansion.reviews_limit,
+        expansion.tags_limit,
+    )
 
-    return books
+    return {"items": items, "next_cursor": next_cursor}
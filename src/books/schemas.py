@@ -1,14 +1,37 @@
 import uuid
 from datetime import date, datetime
-from typing import List, Optional
+from enum import Enum
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 from src.reviews.schemas import ReviewModel
 from src.tags.schemas import TagModel
 
 
-class BookModel(BaseModel):
+class BookInclude(str, Enum):
+    REVIEWS = "reviews"
+    TAGS = "tags"
+
+
+class BookSort(str, Enum):
+    NEWEST = "newest"
+    RATING = "rating"
+
+
+class LeaderboardBy(str, Enum):
+    RATING = "rating"
+    REVIEWS = "reviews"
+
+
+class LeaderboardWindow(str, Enum):
+    ALL = "all"
+    DAY = "1d"
+    WEEK = "7d"
+    MONTH = "30d"
+
+
+class BookSummaryModel(BaseModel):
     uid: uuid.UUID
     title: str
     author: str
@@ -19,10 +42,74 @@ class BookModel(BaseModel):
     user_uid: Optional[uuid.UUID]
     created_at: datetime
     updated_at: datetime
+    version: int
+    review_count: int
+    avg_rating: float
+
+
+class BookRankingModel(BookSummaryModel):
+    score: float
+
+
+class BookRatingCountModel(BaseModel):
+    rating: int
+    count: int
+
+
+class BookRatingsModel(BaseModel):
+    total: int
+    average: float
+    counts: List[BookRatingCountModel]
+    # Nearest-rank percentiles, keyed p25, p50, p75 and p90; empty without
+    # reviews.
+    percentiles: Dict[str, int]
+
+
+class BookModel(BookSummaryModel):
     reviews: List[ReviewModel]
     tags: List[TagModel]
 
 
+class BookListItemModel(BookSummaryModel):
+    reviews: Optional[List[ReviewModel]] = None
+    tags: Optional[List[TagModel]] = None
+
+
+class BookPageModel(BaseModel):
+    items: List[BookListItemModel]
+    next_cursor: Optional[str]
+
+
+class BookFilterModel(BaseModel):
+    language: Optional[str] = None
+    publisher: Optional[str] = None
+    author: Optional[str] = None
+    tag: Optional[str] = None
+    published_from: Optional[date] = None
+    published_to: Optional[date] = None
+    min_pages: Optional[int] = Field(default=None, ge=0)
+    max_pages: Optional[int] = Field(default=None, ge=0)
+
+
+class BookFacetCountModel(BaseModel):
+    value: str
+    count: int
+
+
+class BookFacetsModel(BaseModel):
+    total: int
+    language: List[BookFacetCountModel]
+    publisher: List[BookFacetCountModel]
+    author: List[BookFacetCountModel]
+    tag: List[BookFacetCountModel]
+
+
+class BookSuggestionModel(BaseModel):
+    text: str
+    kind: str
+    book_uid: Optional[uuid.UUID]
+
+
 class BookUpdateModel(BaseModel):
     title: str
     author: str
@@ -30,6 +117,32 @@ class BookUpdateModel(BaseModel):
     language: str
 
 
+class BookPatchModel(BaseModel):
+    title: Optional[str] = None
+    author: Optional[str] = None
+    publisher: Optional[str] = None
+    language: Optional[str] = None
+
+
+class BookBulkUpdateModel(BaseModel):
+    uids: List[uuid.UUID] = Field(min_length=1, max_length=1000)
+    changes: BookPatchModel
+
+
+class BookBulkUpdateResultModel(BaseModel):
+    updated: List[uuid.UUID]
+    not_found: List[uuid.UUID]
+
+
+class BookBulkDeleteModel(BaseModel):
+    uids: List[uuid.UUID] = Field(min_length=1, max_length=10000)
+
+
+class BookBulkDeleteResultModel(BaseModel):
+    deleted: List[uuid.UUID]
+    not_found: List[uuid.UUID]
+
+
 class BookCreateModel(BaseModel):
     title: str
     author: str
@@ -37,3 +150,14 @@ class BookCreateModel(BaseModel):
     published_date: str
     page_count: int
     language: str
+
+
+class BookImportErrorModel(BaseModel):
+    index: int
+    errors: List[dict]
+
+
+class BookImportResultModel(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[BookImportErrorModel]
@@ -0,0 +1,71 @@
+from sqlalchemy import ColumnClause, column, desc, func, literal_column, table
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlmodel import col, select
+
+from src.database.main import async_engine
+from src.database.models import BOOK_LIST_OPTIONS, Book
+
+# Postgres keeps a generated, weighted tsvector on books, created by the
+# add_books_search_vector migration. SQLite, used for local runs and tests,
+# mirrors the searchable columns into an FTS5 table kept in sync by triggers,
+# created at startup next to the tables initdb creates.
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS books_fts "
+    "USING fts5(uid UNINDEXED, title, author, publisher)",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_insert AFTER INSERT ON books BEGIN "
+    "INSERT INTO books_fts (uid, title, author, publisher) "
+    "VALUES (new.uid, new.title, new.author, new.publisher); END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_delete AFTER DELETE ON books BEGIN "
+    "DELETE FROM books_fts WHERE uid = old.uid; END",
+    "CREATE TRIGGER IF NOT EXISTS books_fts_update AFTER UPDATE ON books BEGIN "
+    "UPDATE books_fts SET title = new.title, author = new.author, "
+    "publisher = new.publisher WHERE uid = old.uid; END",
+]
+
+
+async def _create_search_index(connection: AsyncConnection) -> None:
+    if connection.dialect.name == "sqlite":
+        exists = await connection.exec_driver_sql(
+            "SELECT 1 FROM sqlite_master WHERE name = 'books_fts'"
+        )
+        backfill = exists.first() is None
+        for ddl in SQLITE_DDL:
+            await connection.exec_driver_sql(ddl)
+        if backfill:
+            await connection.exec_driver_sql(
+                "INSERT INTO books_fts (uid, title, author, publisher) "
+                "SELECT uid, title, author, publisher FROM books"
+            )
+
+
+async def init_search_index() -> None:
+    async with async_engine.begin() as connection:
+        await _create_search_index(connection)
+
+
+def _fts5_query(q: str) -> str:
+    # Quote every term so user input is never parsed as FTS5 syntax, and let
+    # the last term match as a prefix.
+    terms = ['"' + term.replace('"', '""') + '"' for term in q.split()]
+    if terms:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+def search_statement(q: str, dialect: str):
+    statement = select(Book).options(*BOOK_LIST_OPTIONS)
+
+    if dialect == "sqlite":
+        fts = table("books_fts", column("uid"))
+        fts_name: ColumnClause = literal_column("books_fts")
+        return (
+            statement.join(fts, fts.c.uid == Book.uid)
+            .where(fts_name.op("MATCH")(_fts5_query(q)))
+            .order_by(func.bm25(fts_name, 0.0, 10.0, 5.0, 1.0), col(Book.uid))
+        )
+
+    query = func.websearch_to_tsquery("simple", q)
+    vector: ColumnClause = literal_column("books.search_vector")
+    return statement.where(vector.op("@@")(query)).order_by(
+        desc(func.ts_rank_cd(vector, query)), col(Book.uid)
+    )
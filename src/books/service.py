@@ -1,28 +1,199 @@
 from sqlmodel.ext.asyncio.session import AsyncSession
-from src.database.models import Book
-from src.books.schemas import BookCreateModel, BookUpdateModel
-from sqlmodel import select, desc
+from src.database.main import execute
+from src.database.models import BOOK_LIST_OPTIONS, Book, BookRatingCount, BookSimilarity, BookTag, Review, Tag, table
+from src.books.leaderboard import leaderboard
+from src.books.schemas import BookCreateModel, BookFacetsModel, BookFilterModel, BookInclude, BookModel, BookPatchModel, BookSort, BookUpdateModel, LeaderboardBy, LeaderboardWindow
+from src.books.search import search_statement
+from src.books.suggest import suggest_index
+from src.cache import TwoTierCache
+from src.config import Config
+from src.errors import BookVersionConflictError, InvalidCursorError
+from src.etag import version_etag
+from src.export import EXPORT_BATCH_SIZE
+from src.pagination import decode_cursor, encode_cursor
+from sqlmodel import col, select, desc
+from sqlalchemy import Float, RowMapping, case, cast, delete, func, insert, or_, select as core_select, tuple_, update
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import aliased
+from pydantic import ValidationError
 from datetime import datetime
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, List, Optional, Set, Tuple, Union
+import hashlib
+import json
+import logging
 import uuid
 
+book_cache = TwoTierCache("book", BookModel)
+# Counts are not invalidated on writes; they lag by at most the TTL.
+facets_cache = TwoTierCache("facets", BookFacetsModel, ttl=Config.FACETS_CACHE_TTL, local_ttl=Config.FACETS_CACHE_TTL)
+
+# Keyset columns per sort order: column, cursor value parser and serializer.
+SORT_KEYS: Dict[BookSort, Tuple[Any, Callable[[Any], Any], Callable[[Any], Any]]] = {
+    BookSort.NEWEST: (Book.created_at, datetime.fromisoformat, datetime.isoformat),
+    BookSort.RATING: (Book.avg_rating, float, float),
+}
+
+
 class BookService:
 
-    async def get_user_books(self, user_id: str, session: AsyncSession):
+    async def get_user_books(self, user_id: str, session: AsyncSession, limit: int, cursor: Optional[str] = None, sort: BookSort = BookSort.NEWEST):
+        statement = select(Book).where(Book.user_uid == user_id)
+
+        return await self._paginate(statement, session, limit, cursor, sort)
+
+    async def get_all_books(self, session: AsyncSession, limit: int, cursor: Optional[str] = None, sort: BookSort = BookSort.NEWEST, filters: Optional[BookFilterModel] = None):
+        statement = select(Book).where(*_filter_conditions(filters))
+
+        return await self._paginate(statement, session, limit, cursor, sort)
+
+    async def get_tag_books(self, tag_uid: uuid.UUID, session: AsyncSession, limit: int, cursor: Optional[str] = None, sort: BookSort = BookSort.NEWEST):
+        statement = select(Book).join(BookTag, col(BookTag.book_id) == Book.uid).where(BookTag.tag_id == tag_uid)
+
+        return await self._paginate(statement, session, limit, cursor, sort)
+
+    async def _paginate(self, statement, session: AsyncSession, limit: int, cursor: Optional[str], sort: BookSort = BookSort.NEWEST):
+        column, parse, dump = SORT_KEYS[sort]
+
+        if cursor:
+            value, uid = decode_cursor(cursor, 2)
+            try:
+                after = (parse(value), uuid.UUID(uid))
+            except (TypeError, ValueError):
+                raise InvalidCursorError()
+            statement = statement.where(tuple_(column, col(Book.uid)) < after)
+
         statement = (
-            select(Book)
-            .where(Book.user_uid == user_id)
-            .order_by(desc(Book.created_at)))
+            statement.options(*BOOK_LIST_OPTIONS)
+            .order_by(desc(column), desc(Book.uid))
+            .limit(limit + 1))
 
         result = await session.exec(statement)
 
-        return result.all()
+        books = result.all()
+
+        next_cursor = None
+        if len(books) > limit:
+            books = books[:limit]
+            last = books[-1]
+            next_cursor = encode_cursor([dump(getattr(last, column.key)), str(last.uid)])
+
+        return books, next_cursor
+
+    async def get_facets(self, filters: BookFilterModel, limit: int, session: AsyncSession) -> BookFacetsModel:
+        key = hashlib.blake2b(
+            json.dumps([filters.model_dump(mode="json", exclude_none=True), limit], sort_keys=True).encode(),
+            digest_size=16).hexdigest()
+
+        return await facets_cache.get_or_load(key, lambda: self._count_facets(filters, limit, session))
+
+    async def _count_facets(self, filters: BookFilterModel, limit: int, session: AsyncSession) -> dict:
+        conditions = _filter_conditions(filters)
+
+        total = await session.exec(select(func.count()).select_from(Book).where(*conditions))
+
+        facets: dict = {"total": total.one()}
+
+        for name, column in (("language", Book.language), ("publisher", Book.publisher), ("author", Book.author)):
+            count = func.count().label("count")
+            statement = select(column, count).where(*conditions).group_by(column).order_by(desc(count), column).limit(limit)
+            rows = await session.exec(statement)
+            facets[name] = [{"value": value, "count": n} for value, n in rows.all()]
+
+        count = func.count().label("count")
+        statement = (
+            select(Tag.name, count)
+            .join(BookTag, col(BookTag.tag_id) == Tag.uid)
+            .join(Book, col(Book.uid) == BookTag.book_id)
+            .where(*conditions)
+            .group_by(Tag.name)
+            .order_by(desc(count), Tag.name)
+            .limit(limit))
+        rows = await session.exec(statement)
+        facets["tag"] = [{"value": value, "count": n} for value, n in rows.all()]
+
+        return facets
+
+    async def expand_books(self, books: List[Book], session: AsyncSession, include: Set[BookInclude], reviews_limit: int, tags_limit: int) -> List[dict]:
+        items = [book.model_dump() for book in books]
+        book_uids = [book.uid for book in books]
+
+        if book_uids and BookInclude.REVIEWS in include:
+            reviews = await self._latest_reviews(book_uids, reviews_limit, session)
+            for item in items:
+                item["reviews"] = reviews.get(item["uid"], [])
+
+        if book_uids and BookInclude.TAGS in include:
+            tags = await self._first_tags(book_uids, tags_limit, session)
+            for item in items:
+                item["tags"] = tags.get(item["uid"], [])
+
+        return items
+
+    async def _latest_reviews(self, book_uids: List[uuid.UUID], limit: int, session: AsyncSession) -> Dict[uuid.UUID, list]:
+        ranked = (
+            select(
+                Review,
+                func.row_number()
+                .over(partition_by=col(Review.book_uid), order_by=desc(Review.created_at))
+                .label("position"))
+            .where(col(Review.book_uid).in_(book_uids))
+            .subquery())
+        ranked_review = aliased(Review, ranked)
+        statement = (
+            select(ranked_review)
+            .where(ranked.c.position <= limit)
+            .order_by(ranked.c.book_uid, ranked.c.position))
+
+        result = await session.exec(statement)
+
+        reviews: Dict[uuid.UUID, list] = {}
+        for review in result.all():
+            # Only reviews of the given books are ranked, so book_uid is set.
+            reviews.setdefault(review.book_uid, []).append(review.model_dump())  # type: ignore[arg-type]
+
+        return reviews
+
+    async def _first_tags(self, book_uids: List[uuid.UUID], limit: int, session: AsyncSession) -> Dict[uuid.UUID, list]:
+        # Tag rows are read as plain columns so Tag.books is never loaded.
+        ranked = (
+            core_select(
+                col(BookTag.book_id),
+                col(Tag.uid),
+                col(Tag.name),
+                col(Tag.created_at),
+                col(Tag.version),
+                func.row_number()
+                .over(partition_by=col(BookTag.book_id), order_by=Tag.name)
+                .label("position"))
+            .join(Tag, col(Tag.uid) == BookTag.tag_id)
+            .where(col(BookTag.book_id).in_(book_uids))
+            .subquery())
+        statement = (
+            core_select(ranked.c.book_id, ranked.c.uid, ranked.c.name, ranked.c.created_at, ranked.c.version)
+            .where(ranked.c.position <= limit)
+            .order_by(ranked.c.book_id, ranked.c.position))
+
+        result = await execute(session, statement)
+
+        tags: Dict[uuid.UUID, list] = {}
+        for book_id, uid, name, created_at, version in result.all():
+            tags.setdefault(book_id, []).append({"uid": uid, "name": name, "created_at": created_at, "version": version})
+
+        return tags
 
-    async def get_all_books(self, session: AsyncSession):
-        statement = select(Book).order_by(desc(Book.created_at))
+    async def get_tag_versions(self, book_uids: List[uuid.UUID], session: AsyncSession) -> Dict[uuid.UUID, List[Tuple[uuid.UUID, int]]]:
+        statement = (
+            select(BookTag.book_id, Tag.uid, Tag.version)
+            .join(Tag, col(Tag.uid) == BookTag.tag_id)
+            .where(col(BookTag.book_id).in_(book_uids)))
 
         result = await session.exec(statement)
 
-        return result.all()
+        versions: Dict[uuid.UUID, List[Tuple[uuid.UUID, int]]] = {}
+        for book_id, uid, version in result.all():
+            versions.setdefault(book_id, []).append((uid, version))
+
+        return versions
 
     async def create_book(self, book_data: BookCreateModel, user_uid: str, session: AsyncSession):
         book_data_dict = book_data.model_dump()
@@ -35,8 +206,121 @@ class BookService:
 
         await session.commit()
 
+        suggest_index.add(new_book.uid, new_book.title, new_book.author)
+
         return new_book
 
+    async def import_books(self, rows: AsyncIterable[Union[bytes, dict]], user_uid: str, session: AsyncSession, chunk_size: int, max_errors: int):
+        owner_uid = uuid.UUID(user_uid)
+        report: dict = {"inserted": 0, "failed": 0, "errors": []}
+
+        def reject(index: int, errors: list):
+            report["failed"] += 1
+            if len(report["errors"]) < max_errors:
+                report["errors"].append({"index": index, "errors": errors})
+
+        chunk: List[dict] = []
+        chunk_indexes: List[int] = []
+        index = -1
+        async for row in rows:
+            index += 1
+            try:
+                if isinstance(row, dict):
+                    book_data = BookCreateModel.model_validate(row)
+                else:
+                    book_data = BookCreateModel.model_validate_json(row)
+                values = book_data.model_dump()
+                values["published_date"] = datetime.strptime(values["published_date"], "%Y-%m-%d").date()
+            except ValidationError as e:
+                reject(index, e.errors(include_url=False, include_context=False, include_input=False))
+                continue
+            except ValueError as e:
+                reject(index, [{"loc": ["published_date"], "msg": str(e), "type": "value_error"}])
+                continue
+
+            values["uid"] = uuid.uuid4()
+            values["user_uid"] = owner_uid
+            chunk.append(values)
+            chunk_indexes.append(index)
+
+            if len(chunk) >= chunk_size:
+                await self._insert_chunk(chunk, chunk_indexes, session, report, reject)
+                chunk, chunk_indexes = [], []
+
+        if chunk:
+            await self._insert_chunk(chunk, chunk_indexes, session, report, reject)
+
+        return report
+
+    async def _insert_chunk(self, chunk: List[dict], chunk_indexes: List[int], session: AsyncSession, report: dict, reject):
+        # One executemany per chunk; the driver batches it into multi-row INSERTs.
+        try:
+            connection = await session.connection()
+            await connection.execute(insert(table(Book)), chunk)
+            await session.commit()
+            inserted = chunk
+        except SQLAlchemyError as e:
+            await session.rollback()
+            logging.error(f"Error importing books: {e}")
+            inserted = await self._insert_rows(chunk, chunk_indexes, session, reject)
+
+        report["inserted"] += len(inserted)
+
+        suggest_index.add_many((values["uid"], values["title"], values["author"]) for values in inserted)
+
+    async def _insert_rows(self, chunk: List[dict], chunk_indexes: List[int], session: AsyncSession, reject) -> List[dict]:
+        # Retry a refused chunk row by row, each in a savepoint, so the error
+        # is reported against the rows that caused it. The savepoint is only
+        # emitted once the session hands out a connection inside the block.
+        inserted = []
+        for index, values in zip(chunk_indexes, chunk):
+            try:
+                async with session.begin_nested():
+                    connection = await session.connection()
+                    await connection.execute(insert(table(Book)), [values])
+            except SQLAlchemyError as e:
+                reject(index, [{"loc": [], "msg": str(getattr(e, "orig", None) or e).splitlines()[0], "type": "database_error"}])
+                continue
+            inserted.append(values)
+
+        await session.commit()
+
+        return inserted
+
+    async def search_books(self, q: str, session: AsyncSession, limit: int, cursor: Optional[str] = None):
+        if not q.strip():
+            return [], None
+
+        offset = 0
+        if cursor:
+            (offset,) = decode_cursor(cursor, 1)
+            if not isinstance(offset, int) or offset < 0:
+                raise InvalidCursorError()
+
+        statement = search_statement(q, session.bind.dialect.name)
+
+        result = await session.exec(statement.offset(offset).limit(limit + 1))
+
+        books = result.all()
+
+        next_cursor = None
+        if len(books) > limit:
+            books = books[:limit]
+            next_cursor = encode_cursor([offset + limit])
+
+        return books, next_cursor
+
+    async def stream_books(self, session: AsyncSession) -> AsyncIterator[RowMapping]:
+        statement = (
+            select(*table(Book).columns)
+            .order_by(col(Book.created_at), col(Book.uid))
+            .execution_options(yield_per=EXPORT_BATCH_SIZE))
+
+        result = await session.stream(statement)
+
+        async for row in result.mappings():
+            yield row
+
     async def get_book(self, book_uid: str, session: AsyncSession):
         statement = select(Book).where(Book.uid == uuid.UUID(book_uid))
 
@@ -46,29 +330,260 @@ class BookService:
 
         return book if book else None
 
-    async def update_book(self, book_uid: str, update_data: BookUpdateModel, session: AsyncSession):
-        book_to_update = await self.get_book(book_uid, session)
+    async def get_book_etag(self, book_uid: str, session: AsyncSession) -> Optional[str]:
+        # The book version and its tags' versions in one query.
+        statement = (
+            select(Book.version, Tag.uid, Tag.version)
+            .outerjoin(BookTag, col(BookTag.book_id) == Book.uid)
+            .outerjoin(Tag, col(Tag.uid) == BookTag.tag_id)
+            .where(Book.uid == uuid.UUID(book_uid)))
 
-        if book_to_update:
-            update_data_dict = update_data.model_dump()
+        result = await session.exec(statement)
 
-            for key, value in update_data_dict.items():
-                setattr(book_to_update, key, value)
+        rows = result.all()
+        if not rows:
+            return None
 
-            setattr(book_to_update, "updated_at", datetime.now())
+        return version_etag(rows[0][0], [(uid, version) for _, uid, version in rows if uid is not None])
 
-            await session.commit()
+    async def get_book_version(self, book_uid: str, session: AsyncSession) -> Optional[int]:
+        statement = select(Book.version).where(Book.uid == uuid.UUID(book_uid))
 
-            return book_to_update
-        else:
+        result = await session.exec(statement)
+
+        return result.first()
+
+    async def bump_versions(self, condition, session: AsyncSession) -> List[uuid.UUID]:
+        # Anything embedded in a book representation (reviews, tags) changes
+        # its version so ETags of cached copies stop matching.
+        statement = (
+            update(Book)
+            .where(condition)
+            .values(version=Book.version + 1)
+            .returning(col(Book.uid))
+            .execution_options(synchronize_session=False))
+
+        result = await execute(session, statement)
+
+        return [uid for (uid,) in result.all()]
+
+    async def apply_review_stats(self, book_uid: uuid.UUID, count_delta: int, rating_delta: int, session: AsyncSession) -> Optional[Tuple[int, float]]:
+        # Applied in the caller's transaction.
+        statement = (
+            review_stats_update(book_uid, count_delta, rating_delta)
+            .returning(Book.review_count, Book.avg_rating)
+            .execution_options(synchronize_session=False))
+
+        result = await session.exec(statement)
+
+        return result.first()
+
+    async def reconcile_review_stats(self, session: AsyncSession) -> List[uuid.UUID]:
+        review_count = select(func.count(col(Review.uid))).where(Review.book_uid == Book.uid).scalar_subquery()
+        rating_sum = select(func.coalesce(func.sum(Review.rating), 0)).where(Review.book_uid == Book.uid).scalar_subquery()
+
+        statement = (
+            update(Book)
+            .where(or_(col(Book.review_count) != review_count, col(Book.rating_sum) != rating_sum))
+            .values(
+                review_count=review_count,
+                rating_sum=rating_sum,
+                avg_rating=_average(rating_sum, review_count),
+                version=Book.version + 1)
+            .returning(col(Book.uid))
+            .execution_options(synchronize_session=False))
+
+        result = await execute(session, statement)
+
+        repaired = list(result.scalars())
+
+        await session.commit()
+
+        for start in range(0, len(repaired), Config.BULK_CHUNK_SIZE):
+            await book_cache.invalidate(*[str(uid) for uid in repaired[start:start + Config.BULK_CHUNK_SIZE]])
+
+        return repaired
+
+    async def get_top_books(self, by: LeaderboardBy, window: LeaderboardWindow, limit: int, session: AsyncSession) -> List[dict]:
+        ranked = await leaderboard.top(by, window, limit)
+        if not ranked:
+            return []
+
+        statement = select(Book).where(col(Book.uid).in_([uid for uid, _ in ranked])).options(*BOOK_LIST_OPTIONS)
+
+        result = await session.exec(statement)
+
+        books = {book.uid: book for book in result.all()}
+
+        return [
+            {**books[uid].model_dump(), "score": score}
+            for uid, score in ranked
+            if uid in books
+        ]
+
+    async def get_similar_books(self, book_uid: str, limit: int, session: AsyncSession) -> Optional[List[dict]]:
+        try:
+            uid = uuid.UUID(book_uid)
+        except ValueError:
             return None
 
-    async def delete_book(self, book_uid: str, session: AsyncSession):
-        book_to_delete = await self.get_book(book_uid, session)
+        statement = (
+            select(Book, BookSimilarity.score)
+            .join(BookSimilarity, col(BookSimilarity.similar_uid) == Book.uid)
+            .where(BookSimilarity.book_uid == uid)
+            .options(*BOOK_LIST_OPTIONS)
+            .order_by(col(BookSimilarity.rank))
+            .limit(limit))
 
-        if book_to_delete:
-            await session.delete(book_to_delete)
-            await session.commit()
-            return {}
-        else:
+        result = await session.exec(statement)
+
+        similar = [{**book.model_dump(), "score": score} for book, score in result.all()]
+
+        if not similar and await self.get_book_version(book_uid, session) is None:
             return None
+
+        return similar
+
+    async def get_book_details(self, book_uid: str, session: AsyncSession) -> Optional[BookModel]:
+        return await book_cache.get_or_load(
+            str(uuid.UUID(book_uid)), lambda: self.get_book(book_uid, session))
+
+    async def update_book(self, book_uid: str, update_data: BookUpdateModel, session: AsyncSession, versions: Optional[List[int]] = None) -> Optional[dict]:
+        # A single UPDATE ... RETURNING: no read, no relationship loading.
+        statement = (
+            update(Book)
+            .where(col(Book.uid) == uuid.UUID(book_uid))
+            .values(**update_data.model_dump(), updated_at=datetime.now(), version=Book.version + 1)
+            .returning(*table(Book).columns)
+            .execution_options(synchronize_session=False))
+
+        if versions is not None:
+            statement = statement.where(col(Book.version).in_(versions))
+
+        result = await execute(session, statement)
+
+        book = result.mappings().first()
+
+        await session.commit()
+
+        if book is None:
+            if versions is not None and await self.get_book_version(book_uid, session) is not None:
+                raise BookVersionConflictError()
+            return None
+
+        suggest_index.add(book["uid"], book["title"], book["author"])
+        await book_cache.invalidate(str(book["uid"]))
+
+        return dict(book)
+
+    async def update_books(self, book_uids: List[uuid.UUID], update_data: BookPatchModel, session: AsyncSession):
+        statement = (
+            update(Book)
+            .where(col(Book.uid).in_(book_uids))
+            .values(**update_data.model_dump(exclude_unset=True), updated_at=datetime.now(), version=Book.version + 1)
+            .returning(col(Book.uid), col(Book.title), col(Book.author))
+            .execution_options(synchronize_session=False))
+
+        result = await execute(session, statement)
+
+        updated = result.tuples().all()
+
+        await session.commit()
+
+        suggest_index.add_many(updated)
+        if updated:
+            await book_cache.invalidate(*[str(uid) for uid, _, _ in updated])
+
+        updated_uids = {uid for uid, _, _ in updated}
+        return {
+            "updated": [uid for uid in book_uids if uid in updated_uids],
+            "not_found": [uid for uid in book_uids if uid not in updated_uids],
+        }
+
+    async def delete_book(self, book_uid: str, session: AsyncSession):
+        deleted = await self.delete_books([uuid.UUID(book_uid)], session)
+
+        return {} if deleted else None
+
+    async def delete_books(self, book_uids: List[uuid.UUID], session: AsyncSession) -> List[uuid.UUID]:
+        # Set-based deletes in one transaction; nothing is loaded into the
+        # session. The foreign keys cascade too, but SQLite only enforces them
+        # when asked to, so dependent rows are removed explicitly.
+        deleted: List[uuid.UUID] = []
+        deleted_reviews: List[uuid.UUID] = []
+
+        for start in range(0, len(book_uids), Config.BULK_CHUNK_SIZE):
+            chunk = book_uids[start:start + Config.BULK_CHUNK_SIZE]
+
+            await execute(session, delete(BookTag).where(col(BookTag.book_id).in_(chunk)))
+            await execute(session, delete(BookRatingCount).where(col(BookRatingCount.book_uid).in_(chunk)))
+            await execute(session, delete(BookSimilarity).where(or_(col(BookSimilarity.book_uid).in_(chunk), col(BookSimilarity.similar_uid).in_(chunk))))
+
+            result = await execute(session, delete(Review).where(col(Review.book_uid).in_(chunk)).returning(col(Review.uid)))
+            deleted_reviews.extend(result.scalars().all())
+
+            result = await execute(session, delete(Book).where(col(Book.uid).in_(chunk)).returning(col(Book.uid)))
+            deleted.extend(result.scalars().all())
+
+        await session.commit()
+
+        # Imported here because the reviews service imports this module.
+        from src.reviews.service import review_cache
+
+        for start in range(0, len(deleted), Config.BULK_CHUNK_SIZE):
+            chunk = deleted[start:start + Config.BULK_CHUNK_SIZE]
+            suggest_index.remove_many(chunk)
+            await book_cache.invalidate(*[str(uid) for uid in chunk])
+            await leaderboard.remove(chunk)
+
+        for start in range(0, len(deleted_reviews), Config.BULK_CHUNK_SIZE):
+            chunk = deleted_reviews[start:start + Config.BULK_CHUNK_SIZE]
+            await review_cache.invalidate(*[str(uid) for uid in chunk])
+
+        return deleted
+
+
+def review_stats_update(book_uid: uuid.UUID, count_delta: int, rating_delta: int):
+    # The new values are computed by the database from the current row, so
+    # concurrent reviews cannot overwrite each other.
+    review_count = Book.review_count + count_delta
+    rating_sum = Book.rating_sum + rating_delta
+
+    return (
+        update(Book)
+        .where(col(Book.uid) == book_uid)
+        .values(
+            review_count=review_count,
+            rating_sum=rating_sum,
+            avg_rating=_average(rating_sum, review_count),
+            version=Book.version + 1))
+
+
+def _average(rating_sum, review_count):
+    return case((review_count > 0, cast(rating_sum, Float) / review_count), else_=0.0)
+
+
+def _filter_conditions(filters: Optional[BookFilterModel]) -> list:
+    if filters is None:
+        return []
+
+    conditions: list = []
+    if filters.language is not None:
+        conditions.append(Book.language == filters.language)
+    if filters.publisher is not None:
+        conditions.append(Book.publisher == filters.publisher)
+    if filters.author is not None:
+        conditions.append(Book.author == filters.author)
+    if filters.published_from is not None:
+        conditions.append(Book.published_date >= filters.published_from)
+    if filters.published_to is not None:
+        conditions.append(Book.published_date <= filters.published_to)
+    if filters.min_pages is not None:
+        conditions.append(Book.page_count >= filters.min_pages)
+    if filters.max_pages is not None:
+        conditions.append(Book.page_count <= filters.max_pages)
+    if filters.tag is not None:
+        tagged = select(BookTag.book_id).join(Tag, col(Tag.uid) == BookTag.tag_id).where(Tag.name == filters.tag)
+        conditions.append(col(Book.uid).in_(tagged))
+
+    return conditions
@@ -0,0 +1,257 @@
+import logging
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import scipy.sparse as sp
+from sqlalchemy import delete, func, insert
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.config import Config
+from src.database.main import execute
+from src.database.models import BookSimilarity, BookTag, table
+
+BLOCK_SIZE = 2048
+LOAD_BATCH_SIZE = 50000
+
+
+def weighted_matrix(
+    books: np.ndarray,
+    tags: np.ndarray,
+    shape: Tuple[int, int],
+    tag_counts: np.ndarray,
+    total_books: int,
+) -> sp.csr_matrix:
+    """Book x tag matrix with IDF weights and L2-normalized rows.
+
+    A row product is the cosine similarity of two books. Tags carried by
+    more than ``SIMILAR_MAX_TAG_BOOKS`` books are dropped: they say little
+    about a book and would make every product dense.
+    """
+    idf = np.log1p(total_books / np.maximum(tag_counts, 1)).astype(np.float32)
+    idf[tag_counts > Config.SIMILAR_MAX_TAG_BOOKS] = 0
+
+    matrix = sp.csr_matrix((idf[tags], (books, tags)), shape=shape, dtype=np.float32)
+    matrix.sum_duplicates()
+    matrix.eliminate_zeros()
+
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1)).ravel())
+    norms[norms == 0] = 1
+    return sp.csr_matrix(sp.diags(1 / norms) @ matrix, dtype=np.float32)
+
+
+def top_neighbours(
+    matrix: sp.csr_matrix, transposed: sp.csr_matrix, start: int, stop: int, k: int
+) -> Tuple[np.ndarray, ...]:
+    """Top ``k`` neighbours of rows ``start:stop``.
+
+    Returned as (row, column, score, rank) arrays.
+    """
+    product = matrix[start:stop] @ transposed
+
+    rows = np.repeat(np.arange(stop - start), np.diff(product.indptr))
+    columns, scores = product.indices, product.data
+    keep = (columns != rows + start) & (scores > 0)
+    rows, columns, scores = rows[keep], columns[keep], scores[keep]
+
+    # Cosine scores are at most 1, so a single sort on this key orders by
+    # row, then by descending score.
+    order = np.argsort(rows * 4.0 - scores)
+    rows, columns, scores = rows[order], columns[order], scores[order]
+    counts = np.bincount(rows, minlength=stop - start)
+    ranks = np.arange(len(rows)) - (np.cumsum(counts) - counts)[rows]
+    keep = ranks < k
+    rows = rows + start
+
+    return rows[keep], columns[keep], scores[keep], ranks[keep]
+
+
+def compute_neighbours(matrix: sp.csr_matrix, k: int) -> Tuple[np.ndarray, ...]:
+    transposed = matrix.T.tocsr()
+    blocks = range(0, matrix.shape[0], BLOCK_SIZE)
+
+    # SciPy's sparse products and NumPy's sorts release the GIL, so threads
+    # use every core. They also work inside a daemonic Celery worker, which
+    # is not allowed to fork a process pool.
+    with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+        parts = list(
+            executor.map(
+                lambda start: top_neighbours(
+                    matrix,
+                    transposed,
+                    start,
+                    min(start + BLOCK_SIZE, matrix.shape[0]),
+                    k,
+                ),
+                blocks,
+            )
+        )
+
+    if not parts:
+        return tuple(np.empty(0, dtype=np.int64) for _ in range(4))
+    return tuple(np.concatenate(column) for column in zip(*parts))
+
+
+def _indexer(index: Dict[uuid.UUID, int], uids: List[uuid.UUID]):
+    def position(uid: uuid.UUID) -> int:
+        if uid not in index:
+            index[uid] = len(uids)
+            uids.append(uid)
+        return index[uid]
+
+    return position
+
+
+async def rebuild_similarities(session: AsyncSession) -> int:
+    """Recompute every book's neighbours from ``booktag``.
+
+    The stored table is replaced in one transaction.
+    """
+    started = time.perf_counter()
+    book_uids: List[uuid.UUID] = []
+    tag_uids: List[uuid.UUID] = []
+    book_position = _indexer({}, book_uids)
+    tag_position = _indexer({}, tag_uids)
+    book_parts: List[np.ndarray] = []
+    tag_parts: List[np.ndarray] = []
+
+    statement = select(BookTag.book_id, BookTag.tag_id).execution_options(
+        yield_per=LOAD_BATCH_SIZE
+    )
+    result = await session.stream(statement)
+    async for partition in result.partitions():
+        book_parts.append(
+            np.fromiter((book_position(b) for b, _ in partition), dtype=np.int64)
+        )
+        tag_parts.append(
+            np.fromiter((tag_position(t) for _, t in partition), dtype=np.int64)
+        )
+
+    books = np.concatenate(book_parts) if book_parts else np.empty(0, dtype=np.int64)
+    tags = np.concatenate(tag_parts) if tag_parts else np.empty(0, dtype=np.int64)
+    shape = (len(book_uids), len(tag_uids))
+
+    matrix = weighted_matrix(
+        books, tags, shape, np.bincount(tags, minlength=shape[1]), shape[0]
+    )
+    rows, columns, scores, ranks = compute_neighbours(matrix, Config.SIMILAR_BOOKS_K)
+
+    await execute(session, delete(BookSimilarity))
+    connection = await session.connection()
+    for start in range(0, len(rows), Config.BULK_CHUNK_SIZE):
+        stop = start + Config.BULK_CHUNK_SIZE
+        await connection.execute(
+            insert(table(BookSimilarity)),
+            [
+                {
+                    "book_uid": book_uids[row],
+                    "rank": int(rank),
+                    "similar_uid": book_uids[column],
+                    "score": float(score),
+                }
+                for row, column, score, rank in zip(
+                    rows[start:stop],
+                    columns[start:stop],
+                    scores[start:stop],
+                    ranks[start:stop],
+                )
+            ],
+        )
+    await session.commit()
+
+    logging.info(
+        f"Rebuilt {len(rows)} similarities for {shape[0]} books x {shape[1]} tags "
+        f"in {time.perf_counter() - started:.1f}s"
+    )
+    return len(rows)
+
+
+async def update_similarities(book_uid: uuid.UUID, session: AsyncSession) -> int:
+    """Recompute one book's neighbours after its tags changed.
+
+    Only books sharing one of its (not too common) tags can score above zero,
+    so the matrix is built from those candidates alone. Other books' lists
+    pick up the change at the next full rebuild.
+    """
+    tag_counts = await session.exec(
+        select(BookTag.tag_id, func.count())
+        .where(
+            col(BookTag.tag_id).in_(
+                select(BookTag.tag_id).where(BookTag.book_id == book_uid)
+            )
+        )
+        .group_by(col(BookTag.tag_id))
+    )
+    own_tags = {tag: count for tag, count in tag_counts.all()}
+    shared = [
+        tag for tag, count in own_tags.items() if count <= Config.SIMILAR_MAX_TAG_BOOKS
+    ]
+
+    pairs: Sequence[Tuple[uuid.UUID, uuid.UUID]] = []
+    if shared:
+        candidates = select(BookTag.book_id).where(col(BookTag.tag_id).in_(shared))
+        result = await session.exec(
+            select(BookTag.book_id, BookTag.tag_id).where(
+                col(BookTag.book_id).in_(candidates)
+            )
+        )
+        pairs = result.all()
+
+    book_uids: List[uuid.UUID] = [book_uid]
+    tag_uids: List[uuid.UUID] = []
+    book_position = _indexer({book_uid: 0}, book_uids)
+    tag_position = _indexer({}, tag_uids)
+    books = np.fromiter(
+        (book_position(b) for b, _ in pairs), dtype=np.int64, count=len(pairs)
+    )
+    tags = np.fromiter(
+        (tag_position(t) for _, t in pairs), dtype=np.int64, count=len(pairs)
+    )
+
+    counts = dict(own_tags)
+    missing = [tag for tag in tag_uids if tag not in counts]
+    if missing:
+        tag_counts = await session.exec(
+            select(BookTag.tag_id, func.count())
+            .where(col(BookTag.tag_id).in_(missing))
+            .group_by(col(BookTag.tag_id))
+        )
+        counts.update(tag_counts.all())
+    total = await session.exec(select(func.count(func.distinct(BookTag.book_id))))
+    total_books = total.one()
+
+    shape = (len(book_uids), len(tag_uids))
+    matrix = weighted_matrix(
+        books,
+        tags,
+        shape,
+        np.array([counts[tag] for tag in tag_uids], dtype=np.int64),
+        total_books,
+    )
+    _, columns, scores, ranks = top_neighbours(
+        matrix, matrix.T.tocsr(), 0, 1, Config.SIMILAR_BOOKS_K
+    )
+
+    await execute(
+        session, delete(BookSimilarity).where(col(BookSimilarity.book_uid) == book_uid)
+    )
+    if len(columns):
+        await (await session.connection()).execute(
+            insert(table(BookSimilarity)),
+            [
+                {
+                    "book_uid": book_uid,
+                    "rank": int(rank),
+                    "similar_uid": book_uids[column],
+                    "score": float(score),
+                }
+                for column, score, rank in zip(columns, scores, ranks)
+            ],
+        )
+    await session.commit()
+
+    return len(columns)
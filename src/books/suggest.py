@@ -0,0 +1,254 @@
+import asyncio
+import logging
+import sys
+import time
+import unicodedata
+import uuid
+from bisect import bisect_left, insort
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlmodel import select
+
+from src.database.main import Session
+from src.database.models import Book
+from src.metrics import (
+    suggest_index_bytes,
+    suggest_index_entries,
+    suggest_index_rebuild_seconds,
+)
+
+SEPARATOR = "\x00"
+TITLE = "t"
+AUTHOR = "a"
+
+
+def normalize(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text)
+    stripped = "".join(c for c in decomposed if not unicodedata.combining(c))
+    return " ".join(stripped.casefold().split())
+
+
+class PrefixIndex:
+    r"""Sorted array of normalized titles and authors for prefix queries.
+
+    Queries are answered with a binary search. Title keys are
+    ``<title>\0t\0<book uid>``. Author keys are ``<author>\0a`` and
+    reference counted, so an author with thousands of books is stored, and
+    suggested, once.
+    """
+
+    def __init__(self):
+        self._keys: List[str] = []
+        self._books: Dict[uuid.UUID, Tuple[str, str]] = {}
+        self._authors: Dict[str, List] = {}
+        self._bytes = 0
+        self._pending: Optional[List[Tuple]] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, book_uid: uuid.UUID, title: str, author: str) -> None:
+        if self._pending is not None:
+            self._pending.append((book_uid, title, author))
+        self._remove(book_uid)
+        self._add(book_uid, title, author)
+        self._publish()
+
+    def remove(self, book_uid: uuid.UUID) -> None:
+        if self._pending is not None:
+            self._pending.append((book_uid, None, None))
+        self._remove(book_uid)
+        self._publish()
+
+    def add_many(self, books: Iterable[Tuple[uuid.UUID, str, str]]) -> None:
+        """``add`` for a batch.
+
+        One sort of the new keys and one merge into the array, instead of an
+        O(n) insertion per key.
+        """
+        changes: Dict[str, int] = {}
+        for book_uid, title, author in books:
+            if self._pending is not None:
+                self._pending.append((book_uid, title, author))
+            for key in self._forget(book_uid):
+                changes[key] = changes.get(key, 0) - 1
+            for key in self._remember(book_uid, title, author):
+                changes[key] = changes.get(key, 0) + 1
+        self._merge(changes)
+        self._publish()
+
+    def remove_many(self, book_uids: Iterable[uuid.UUID]) -> None:
+        changes: Dict[str, int] = {}
+        for book_uid in book_uids:
+            if self._pending is not None:
+                self._pending.append((book_uid, None, None))
+            for key in self._forget(book_uid):
+                changes[key] = changes.get(key, 0) - 1
+        self._merge(changes)
+        self._publish()
+
+    def suggest(self, prefix: str, limit: int) -> List[dict]:
+        needle = normalize(prefix)
+        if not needle:
+            return []
+
+        suggestions: List[dict] = []
+        seen = set()
+        position = bisect_left(self._keys, needle)
+        while position < len(self._keys) and len(suggestions) < limit:
+            key = self._keys[position]
+            position += 1
+            if not key.startswith(needle):
+                break
+
+            text, kind, *book_uid = key.split(SEPARATOR)
+            if kind == AUTHOR:
+                label = self._authors[text][1]
+            else:
+                label = self._books[uuid.UUID(book_uid[0])][0]
+            if (kind, label) in seen:
+                continue
+            seen.add((kind, label))
+
+            suggestions.append(
+                {
+                    "text": label,
+                    "kind": "author" if kind == AUTHOR else "title",
+                    "book_uid": book_uid[0] if book_uid else None,
+                }
+            )
+
+        return suggestions
+
+    async def rebuild(self) -> None:
+        started = time.perf_counter()
+        # Writes that land while the table is being read are replayed on top
+        # of the fresh snapshot before it is swapped in.
+        self._pending = []
+        try:
+            fresh = PrefixIndex()
+            keys: List[str] = []
+            async with Session() as session:
+                statement = select(Book.uid, Book.title, Book.author).execution_options(
+                    yield_per=5000
+                )
+                result = await session.stream(statement)
+                async for book_uid, title, author in result:
+                    fresh._books[book_uid] = (title, author)
+                    keys.append(fresh._title_key(book_uid, title))
+                    author_key = fresh._count_author(author)
+                    if author_key:
+                        keys.append(author_key)
+
+            keys.sort()
+            fresh._keys = keys
+            fresh._bytes = sum(sys.getsizeof(key) for key in keys)
+
+            for book_uid, title, author in self._pending:
+                fresh._remove(book_uid)
+                if title is not None:
+                    fresh._add(book_uid, title, author)
+        finally:
+            self._pending = None
+
+        self._keys, self._books = fresh._keys, fresh._books
+        self._authors, self._bytes = fresh._authors, fresh._bytes
+        self._publish()
+        suggest_index_rebuild_seconds.set(time.perf_counter() - started)
+
+    async def refresh_periodically(self, interval: float) -> None:
+        # Each worker only sees its own writes incrementally; the periodic
+        # rebuild picks up books written through other workers.
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.rebuild()
+            except Exception as e:
+                logging.error(f"Error rebuilding suggest index: {e}")
+
+    def _title_key(self, book_uid: uuid.UUID, title: str) -> str:
+        return SEPARATOR.join((normalize(title), TITLE, str(book_uid)))
+
+    def _count_author(self, author: str) -> Optional[str]:
+        # Returns the author key when it is seen for the first time.
+        name = normalize(author)
+        if name in self._authors:
+            self._authors[name][0] += 1
+            return None
+        self._authors[name] = [1, author]
+        return SEPARATOR.join((name, AUTHOR))
+
+    def _insert(self, key: str) -> None:
+        insort(self._keys, key)
+        self._bytes += sys.getsizeof(key)
+
+    def _delete(self, key: str) -> None:
+        position = bisect_left(self._keys, key)
+        if position < len(self._keys) and self._keys[position] == key:
+            del self._keys[position]
+            self._bytes -= sys.getsizeof(key)
+
+    def _merge(self, changes: Dict[str, int]) -> None:
+        # Every key is in the array at most once, so a key's net change says
+        # whether it ends up there.
+        removed = {key for key, change in changes.items() if change < 0}
+        added = sorted(key for key, change in changes.items() if change > 0)
+        keys = (
+            [key for key in self._keys if key not in removed] if removed else self._keys
+        )
+
+        # Splice the new keys in between slices of the old array: a binary
+        # search per new key, then one copy of the references.
+        merged: List[str] = []
+        start = 0
+        for key in added:
+            position = bisect_left(keys, key, start)
+            merged.extend(keys[start:position])
+            merged.append(key)
+            start = position
+        merged.extend(keys[start:])
+        self._keys = merged
+        self._bytes += sum(sys.getsizeof(key) for key in added)
+        self._bytes -= sum(sys.getsizeof(key) for key in removed)
+
+    def _remember(self, book_uid: uuid.UUID, title: str, author: str) -> List[str]:
+        # Records the book and returns the keys it brings into the index.
+        self._books[book_uid] = (title, author)
+        keys = [self._title_key(book_uid, title)]
+        author_key = self._count_author(author)
+        if author_key:
+            keys.append(author_key)
+        return keys
+
+    def _forget(self, book_uid: uuid.UUID) -> List[str]:
+        # Drops the book and returns the keys that leave the index with it.
+        book = self._books.pop(book_uid, None)
+        if book is None:
+            return []
+
+        title, author = book
+        keys = [self._title_key(book_uid, title)]
+        name = normalize(author)
+        if name in self._authors:
+            self._authors[name][0] -= 1
+            if self._authors[name][0] == 0:
+                del self._authors[name]
+                keys.append(SEPARATOR.join((name, AUTHOR)))
+        return keys
+
+    def _add(self, book_uid: uuid.UUID, title: str, author: str) -> None:
+        for key in self._remember(book_uid, title, author):
+            self._insert(key)
+
+    def _remove(self, book_uid: uuid.UUID) -> None:
+        for key in self._forget(book_uid):
+            self._delete(key)
+
+    def _publish(self) -> None:
+        suggest_index_entries.set(len(self._keys))
+        suggest_index_bytes.set(
+            self._bytes + sys.getsizeof(self._keys) + sys.getsizeof(self._books)
+        )
+
+
+suggest_index = PrefixIndex()
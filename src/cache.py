@@ -0,0 +1,130 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Hashable, Optional, Tuple
+
+from pydantic import TypeAdapter
+from redis.exceptions import RedisError
+
+from src.config import Config
+from src.database import redis as redis_store
+from src.metrics import cache_requests
+
+MISSING = object()
+
+
+class LocalCache:
+    """Per-worker LRU with a fixed time to live."""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, Tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: Hashable) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return MISSING
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+class TwoTierCache:
+    """Read-through cache with a per-worker LRU in front of Redis.
+
+    Values are validated into ``type_`` once and stored as JSON in Redis.
+    Redis failures degrade to a miss instead of failing the request. Writers
+    call ``invalidate`` after committing; other workers' local entries expire
+    after ``Config.CACHE_LOCAL_TTL`` seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        type_: Any,
+        ttl: Optional[int] = None,
+        local_ttl: Optional[int] = None,
+    ):
+        self.name = name
+        self.ttl = ttl or Config.CACHE_TTL
+        self.adapter = TypeAdapter(type_)
+        self.local = LocalCache(
+            Config.CACHE_LOCAL_MAXSIZE, local_ttl or Config.CACHE_LOCAL_TTL
+        )
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.name}:{key}"
+
+    async def get(self, key: str) -> Any:
+        value = self.local.get(key)
+        if value is not MISSING:
+            cache_requests.labels(self.name, "local_hit").inc()
+            return value
+
+        try:
+            raw = await redis_store.redis_client.get(self._redis_key(key))
+        except RedisError as e:
+            logging.warning(f"Cache {self.name} unavailable: {e}")
+            raw = None
+
+        if raw is None:
+            cache_requests.labels(self.name, "miss").inc()
+            return MISSING
+
+        cache_requests.labels(self.name, "redis_hit").inc()
+        value = self.adapter.validate_json(raw)
+        self.local.set(key, value)
+        return value
+
+    async def set(self, key: str, value: Any) -> Any:
+        value = self.adapter.validate_python(value, from_attributes=True)
+        self.local.set(key, value)
+
+        try:
+            await redis_store.redis_client.set(
+                self._redis_key(key), self.adapter.dump_json(value), ex=self.ttl
+            )
+        except RedisError as e:
+            logging.warning(f"Cache {self.name} unavailable: {e}")
+
+        return value
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await self.get(key)
+        if value is not MISSING:
+            return value
+
+        loaded = await loader()
+        if loaded is None:
+            return None
+
+        return await self.set(key, loaded)
+
+    async def invalidate(self, *keys: str) -> None:
+        for key in keys:
+            self.local.delete(key)
+
+        try:
+            await redis_store.redis_client.delete(
+                *[self._redis_key(key) for key in keys]
+            )
+        except RedisError as e:
+            logging.warning(f"Cache {self.name} unavailable: {e}")
@@ -1,8 +1,14 @@
+import uuid
 from typing import List
 
 from asgiref.sync import async_to_sync
 from celery import Celery
 
+from src.books.leaderboard import leaderboard
+from src.books.ratings import rebuild_rating_counts
+from src.books.service import BookService
+from src.books.similar import rebuild_similarities, update_similarities
+from src.database.main import Session
 from src.mail import create_message, mail
 
 c_app = Celery()
@@ -14,3 +20,47 @@ def send_email(recipients: List[str], subject: str, body: str):
     message = create_message(recipients=recipients, subject=subject, body=body)
 
     async_to_sync(mail.send_message)(message)
+
+
+async def _reconcile_review_stats() -> int:
+    async with Session() as session:
+        repaired = await BookService().reconcile_review_stats(session)
+        await leaderboard.rebuild(session)
+    return len(repaired)
+
+
+@c_app.task
+def reconcile_review_stats() -> int:
+    # Repairs review_count / rating_sum / avg_rating drift left by writes
+    # that bypassed ReviewService, then reloads the leaderboards from them.
+    return async_to_sync(_reconcile_review_stats)()
+
+
+async def _rebuild_book_rating_counts() -> int:
+    async with Session() as session:
+        return await rebuild_rating_counts(session)
+
+
+@c_app.task
+def rebuild_book_rating_counts() -> int:
+    return async_to_sync(_rebuild_book_rating_counts)()
+
+
+async def _rebuild_book_similarities() -> int:
+    async with Session() as session:
+        return await rebuild_similarities(session)
+
+
+@c_app.task
+def rebuild_book_similarities() -> int:
+    return async_to_sync(_rebuild_book_similarities)()
+
+
+async def _update_book_similarities(book_uid: str) -> int:
+    async with Session() as session:
+        return await update_similarities(uuid.UUID(book_uid), session)
+
+
+@c_app.task
+def update_book_similarities(book_uid: str) -> int:
+    return async_to_sync(_update_book_similarities)(book_uid)
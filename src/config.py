@@ -20,6 +20,32 @@ class Settings(BaseSettings):
     VALIDATE_CERTS: bool = True
     DOMAIN: str = ""
     REDIS_URL: str = "redis://localhost:6379/0"
+    DEFAULT_PAGE_SIZE: int = 20
+    MAX_PAGE_SIZE: int = 100
+    BULK_CHUNK_SIZE: int = 1000
+    BULK_MAX_ERRORS: int = 1000
+    BULK_MAX_REVIEWS: int = 10000
+    SUGGEST_REBUILD_INTERVAL: int = 300
+    CACHE_TTL: int = 300
+    CACHE_LOCAL_TTL: int = 5
+    CACHE_LOCAL_MAXSIZE: int = 1024
+    PRINCIPAL_CACHE_TTL: int = 30
+    PRINCIPAL_CACHE_MAXSIZE: int = 10000
+    REVIEW_STATS_RECONCILE_INTERVAL: int = 3600
+    FACETS_CACHE_TTL: int = 60
+    SIMILAR_BOOKS_K: int = 10
+    SIMILAR_MAX_TAG_BOOKS: int = 5000
+    SIMILAR_REBUILD_INTERVAL: int = 86400
+    PASSWORD_HASH_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    LOGIN_RATE_PER_MINUTE: int = 10
+    LOGIN_RATE_BURST: int = 5
+    LOGIN_ACCOUNT_RATE_PER_MINUTE: int = 5
+    LOGIN_ACCOUNT_RATE_BURST: int = 10
+    MAIL_RATE_PER_MINUTE: int = 10
+    MAIL_RATE_BURST: int = 20
+    API_RATE_PER_MINUTE: int = 600
+    API_RATE_BURST: int = 100
     model_config = SettingsConfigDict(
         env_file="./.env", env_file_encoding="utf-8", extra="ignore"
     )
@@ -29,3 +55,13 @@ Config = Settings()
 broker_url = Config.REDIS_URL
 result_backend = Config.REDIS_URL
 broker_connection_retry_on_startup = True
+beat_schedule = {
+    "reconcile-review-stats": {
+        "task": "src.celery_tasks.reconcile_review_stats",
+        "schedule": Config.REVIEW_STATS_RECONCILE_INTERVAL,
+    },
+    "rebuild-book-similarities": {
+        "task": "src.celery_tasks.rebuild_book_similarities",
+        "schedule": Config.SIMILAR_REBUILD_INTERVAL,
+    },
+}
@@ -1,8 +1,9 @@
+from sqlalchemy import Executable, Result
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from src.config import Config
 from sqlmodel import SQLModel
 from sqlmodel.ext.asyncio.session import AsyncSession
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator
 
 async_engine = create_async_engine(url=Config.DATABASE_URL)
 Session = async_sessionmaker(bind=async_engine,
@@ -18,3 +19,9 @@ async def initdb() -> None:
 async def get_session() -> AsyncGenerator[AsyncSession, None]:
     async with Session() as session:
         yield session
+
+
+async def execute(session: AsyncSession, statement: Executable) -> Result[Any]:
+    # AsyncSession.exec runs INSERT, UPDATE and DELETE as well, but is only
+    # typed for SELECT.
+    return await session.exec(statement)  # type: ignore[call-overload]
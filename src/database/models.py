@@ -1,9 +1,11 @@
 import uuid
 from datetime import date, datetime
-from typing import List, Optional
+from typing import List, Optional, Type
 
 import sqlalchemy.dialects.postgresql as pg
-from sqlmodel import Column, Field, Relationship, SQLModel
+from sqlalchemy import Table
+from sqlalchemy.orm import noload
+from sqlmodel import Column, Field, Index, Relationship, SQLModel
 
 
 class User(SQLModel, table=True):  # type: ignore
@@ -12,7 +14,7 @@ class User(SQLModel, table=True):  # type: ignore
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
     username: str
-    email: str
+    email: str = Field(index=True)
     first_name: str
     last_name: str
     role: str = Field(
@@ -36,8 +38,13 @@ class User(SQLModel, table=True):  # type: ignore
 
 
 class BookTag(SQLModel, table=True):  # type: ignore
-    book_id: uuid.UUID = Field(default=None, foreign_key="books.uid", primary_key=True)
-    tag_id: uuid.UUID = Field(default=None, foreign_key="tags.uid", primary_key=True)
+    __table_args__ = (Index("ix_booktag_tag_id_book_id", "tag_id", "book_id"),)
+    book_id: uuid.UUID = Field(
+        default=None, foreign_key="books.uid", primary_key=True, ondelete="CASCADE"
+    )
+    tag_id: uuid.UUID = Field(
+        default=None, foreign_key="tags.uid", primary_key=True, ondelete="CASCADE"
+    )
 
 
 class Tag(SQLModel, table=True):  # type: ignore
@@ -47,10 +54,18 @@ class Tag(SQLModel, table=True):  # type: ignore
     )
     name: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    # Bumped on rename. Books embed their tags, and this version feeds their
+    # ETags, so renaming a popular tag does not rewrite every tagged book.
+    version: int = Field(
+        default=1,
+        sa_column=Column(pg.INTEGER, nullable=False, default=1, server_default="1"),
+    )
+    # Never loaded implicitly: a popular tag carries a large part of the
+    # catalog. Page through GET /tags/{tag_uid}/books instead.
     books: List["Book"] = Relationship(
         link_model=BookTag,
         back_populates="tags",
-        sa_relationship_kwargs={"lazy": "selectin"},
+        sa_relationship_kwargs={"lazy": "noload", "passive_deletes": True},
     )
 
     def __repr__(self) -> str:
@@ -59,6 +74,15 @@ class Tag(SQLModel, table=True):  # type: ignore
 
 class Book(SQLModel, table=True):  # type: ignore
     __tablename__ = "books"
+    __table_args__ = (
+        Index("ix_books_created_at_uid", "created_at", "uid"),
+        Index("ix_books_avg_rating_uid", "avg_rating", "uid"),
+        Index("ix_books_language_created_at_uid", "language", "created_at", "uid"),
+        Index("ix_books_publisher_created_at_uid", "publisher", "created_at", "uid"),
+        Index("ix_books_author_created_at_uid", "author", "created_at", "uid"),
+        Index("ix_books_published_date", "published_date"),
+        Index("ix_books_page_count", "page_count"),
+    )
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
@@ -71,6 +95,24 @@ class Book(SQLModel, table=True):  # type: ignore
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="users.uid")
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
+    version: int = Field(
+        default=1,
+        sa_column=Column(pg.INTEGER, nullable=False, default=1, server_default="1"),
+    )
+    review_count: int = Field(
+        default=0,
+        sa_column=Column(pg.INTEGER, nullable=False, default=0, server_default="0"),
+    )
+    rating_sum: int = Field(
+        default=0,
+        sa_column=Column(pg.INTEGER, nullable=False, default=0, server_default="0"),
+    )
+    avg_rating: float = Field(
+        default=0.0,
+        sa_column=Column(
+            pg.DOUBLE_PRECISION, nullable=False, default=0.0, server_default="0"
+        ),
+    )
     user: Optional[User] = Relationship(back_populates="books")
     reviews: List["Review"] = Relationship(
         back_populates="book", sa_relationship_kwargs={"lazy": "selectin"}
@@ -87,13 +129,20 @@ class Book(SQLModel, table=True):  # type: ignore
 
 class Review(SQLModel, table=True):  # type: ignore
     __tablename__ = "reviews"
+    __table_args__ = (
+        Index("ix_reviews_created_at_uid", "created_at", "uid"),
+        Index("ix_reviews_book_uid_created_at_uid", "book_uid", "created_at", "uid"),
+        Index("ix_reviews_user_uid", "user_uid"),
+    )
     uid: uuid.UUID = Field(
         sa_column=Column(pg.UUID, nullable=False, primary_key=True, default=uuid.uuid4)
     )
     rating: int = Field(lt=5)
     review_text: str = Field(sa_column=Column(pg.VARCHAR, nullable=False))
     user_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="users.uid")
-    book_uid: Optional[uuid.UUID] = Field(default=None, foreign_key="books.uid")
+    book_uid: Optional[uuid.UUID] = Field(
+        default=None, foreign_key="books.uid", ondelete="CASCADE"
+    )
     created_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     updated_at: datetime = Field(sa_column=Column(pg.TIMESTAMP, default=datetime.now))
     user: Optional[User] = Relationship(back_populates="reviews")
@@ -101,3 +150,36 @@ class Review(SQLModel, table=True):  # type: ignore
 
     def __repr__(self):
         return f"<Review for book {self.book_uid} by user {self.user_uid}>"
+
+
+class BookSimilarity(SQLModel, table=True):  # type: ignore
+    __tablename__ = "book_similarities"
+    __table_args__ = (Index("ix_book_similarities_similar_uid", "similar_uid"),)
+    book_uid: uuid.UUID = Field(
+        foreign_key="books.uid", primary_key=True, ondelete="CASCADE"
+    )
+    rank: int = Field(primary_key=True)
+    similar_uid: uuid.UUID = Field(foreign_key="books.uid", ondelete="CASCADE")
+    score: float
+
+
+class BookRatingCount(SQLModel, table=True):  # type: ignore
+    __tablename__ = "book_rating_counts"
+    book_uid: uuid.UUID = Field(
+        foreign_key="books.uid", primary_key=True, ondelete="CASCADE"
+    )
+    rating: int = Field(primary_key=True)
+    count: int = Field(default=0)
+
+
+def table(model: Type[SQLModel]) -> Table:
+    """The model's Core table.
+
+    SQLModel does not declare it to type checkers.
+    """
+    return model.__table__  # type: ignore[attr-defined]
+
+
+# Loader options for queries returning many books; their collections are
+# loaded separately when asked for.
+BOOK_LIST_OPTIONS = (noload(Book.reviews), noload(Book.tags))  # type: ignore[arg-type]
@@ -1,15 +1,59 @@
+import json
+from typing import Tuple
+
 import redis.asyncio as redis
 
 from src.config import Config
 
 JTI_EXPIRY = 3600
+BLOCKLIST_PREFIX = "blacklisted_tokens"
+TOKEN_EPOCH_PREFIX = "token_epoch"  # noqa: S105
+# Every worker mirrors the blocklist and the epochs from this channel.
+REVOCATIONS_CHANNEL = "token_revocations"
+
+redis_client = redis.from_url(Config.REDIS_URL)
+token_block_list = redis_client
+
 
-token_block_list = redis.from_url(Config.REDIS_URL)
+def _blocklist_key(jti: str) -> str:
+    return f"{BLOCKLIST_PREFIX}:{jti}"
+
+
+def _epoch_key(user_uid: str) -> str:
+    return f"{TOKEN_EPOCH_PREFIX}:{user_uid}"
 
 
 async def add_jti_to_block_list(jti: str) -> None:
-    await token_block_list.set(name=jti, value="", ex=JTI_EXPIRY)
+    async with token_block_list.pipeline(transaction=True) as pipe:
+        pipe.set(name=_blocklist_key(jti), value="", ex=JTI_EXPIRY)
+        pipe.publish(REVOCATIONS_CHANNEL, json.dumps({"jti": jti, "ttl": JTI_EXPIRY}))
+        await pipe.execute()
 
 
 async def token_in_blocklist(jti: str) -> bool:
-    return await token_block_list.get(jti) is not None
+    return await token_block_list.get(_blocklist_key(jti)) is not None
+
+
+async def get_token_epoch(user_uid: str) -> int:
+    return int(await token_block_list.get(_epoch_key(user_uid)) or 0)
+
+
+async def bump_token_epoch(user_uid: str) -> int:
+    # Epochs never expire: a lapsed key would read as 0 again and revive
+    # tokens issued before the bump.
+    epoch = await token_block_list.incr(_epoch_key(user_uid))
+    await token_block_list.publish(
+        REVOCATIONS_CHANNEL, json.dumps({"user_uid": user_uid, "epoch": epoch})
+    )
+    return epoch
+
+
+async def token_state(jti: str, user_uid: str) -> Tuple[bool, int]:
+    """Whether ``jti`` is blocklisted and the user's current token epoch.
+
+    Both are read in one round trip.
+    """
+    revoked, epoch = await token_block_list.mget(
+        _blocklist_key(jti), _epoch_key(user_uid)
+    )
+    return revoked is not None, int(epoch or 0)
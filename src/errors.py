@@ -46,6 +46,18 @@ class UserNotFoundError(BookError): ...
 class ReviewNotFoundError(BookError): ...
 
 
+class InvalidCursorError(BookError): ...
+
+
+class BookVersionConflictError(BookError): ...
+
+
+class RateLimitExceededError(BookError):
+    def __init__(self, retry_after: int):
+        super().__init__(retry_after)
+        self.retry_after = retry_after
+
+
 def create_exception_handler(
     status_code: int, initial_detail: Any
 ) -> Callable[[Request, Exception], Awaitable[JSONResponse]]:
@@ -203,6 +215,42 @@ def register_error_handlers(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        InvalidCursorError,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Pagination cursor is invalid",
+                "resolution": "Restart from the first page",
+                "error_code": "invalid_cursor",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        BookVersionConflictError,
+        create_exception_handler(
+            status_code=status.HTTP_412_PRECONDITION_FAILED,
+            initial_detail={
+                "message": "Book was modified by someone else",
+                "resolution": "Fetch the book again and retry with its new ETag",
+                "error_code": "book_version_conflict",
+            },
+        ),
+    )
+
+    @app.exception_handler(RateLimitExceededError)
+    async def rate_limit_exceeded(request: Request, exc: RateLimitExceededError):
+        return JSONResponse(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            content={
+                "message": "Too many requests",
+                "resolution": "Retry after the number of seconds in Retry-After",
+                "error_code": "rate_limit_exceeded",
+            },
+            headers={"Retry-After": str(exc.retry_after)},
+        )
+
     @app.exception_handler(500)
     async def internal_server_error(request: Request, exc: Exception):
         return JSONResponse(
@@ -0,0 +1,62 @@
+import hashlib
+from typing import Any, Iterable, List, Optional, Tuple
+
+from fastapi import Request, Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        digest.update(str(part).encode())
+        digest.update(b"\x00")
+    return f'"{digest.hexdigest()}"'
+
+
+def version_etag(version: int, tags: Iterable[Tuple[Any, int]] = ()) -> str:
+    """``"<version>"``, plus a digest of the embedded tags' versions.
+
+    The digest is only added when the book has tags. If-Match only compares
+    the book version.
+    """
+    parts = sorted(f"{uid}:{tag_version}" for uid, tag_version in tags)
+    if not parts:
+        return f'"{version}"'
+    digest = hashlib.blake2b("\x00".join(parts).encode(), digest_size=8)
+    return f'"{version}.{digest.hexdigest()}"'
+
+
+def _tags(header: str):
+    for tag in header.split(","):
+        tag = tag.strip()
+        # If-None-Match uses the weak comparison, so W/ prefixes are ignored.
+        yield tag[2:] if tag.startswith("W/") else tag
+
+
+def is_not_modified(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    return any(tag in ("*", etag) for tag in _tags(header))
+
+
+def if_match_versions(request: Request) -> Optional[List[int]]:
+    """Versions a conditional write may apply to, or None when unconditional.
+
+    If-Match uses the strong comparison: weak and malformed tags never match.
+    """
+    header = request.headers.get("if-match")
+    if not header or header.strip() == "*":
+        return None
+
+    versions = []
+    for tag in header.split(","):
+        tag = tag.strip()
+        if len(tag) > 2 and tag[0] == tag[-1] == '"':
+            version = tag[1:-1].split(".", 1)[0]
+            if version.isdigit():
+                versions.append(int(version))
+    return versions
+
+
+def not_modified_response(etag: str) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, AsyncIterator, Callable, List, Mapping
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.database.main import Session
+
+EXPORT_BATCH_SIZE = 500
+
+
+class ExportFormat(str, Enum):
+    NDJSON = "ndjson"
+    CSV = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.NDJSON: "application/x-ndjson",
+    ExportFormat.CSV: "text/csv",
+}
+
+
+def _plain(value: Any) -> Any:
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
+
+
+def _encode_ndjson(rows: List[Mapping], columns: List[str]) -> bytes:
+    lines = (
+        json.dumps({column: _plain(row[column]) for column in columns}) for row in rows
+    )
+    return ("\n".join(lines) + "\n").encode()
+
+
+def _encode_csv(rows: List[Mapping], columns: List[str]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerows([_plain(row[column]) for column in columns] for row in rows)
+    return buffer.getvalue().encode()
+
+
+async def export_rows(
+    rows: Callable[[AsyncSession], AsyncIterator[Mapping]],
+    columns: List[str],
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    # The request session is closed before a StreamingResponse starts sending,
+    # so the export owns its session for as long as the cursor is open.
+    encode = _encode_csv if export_format == ExportFormat.CSV else _encode_ndjson
+
+    if export_format == ExportFormat.CSV:
+        yield _encode_csv([dict(zip(columns, columns))], columns)
+
+    async with Session() as session:
+        batch: List[Mapping] = []
+        async for row in rows(session):
+            batch.append(row)
+            if len(batch) >= EXPORT_BATCH_SIZE:
+                yield encode(batch, columns)
+                batch = []
+
+        if batch:
+            yield encode(batch, columns)
@@ -0,0 +1,23 @@
+from prometheus_client import Counter, Gauge
+
+suggest_index_entries = Gauge(
+    "books_suggest_index_entries", "Number of keys in the typeahead prefix index"
+)
+suggest_index_bytes = Gauge(
+    "books_suggest_index_bytes", "Approximate memory held by the prefix index"
+)
+suggest_index_rebuild_seconds = Gauge(
+    "books_suggest_index_rebuild_seconds", "Duration of the last prefix index rebuild"
+)
+
+password_hash_pending = Gauge(
+    "password_hash_pending", "Password hashing jobs queued or running"
+)
+
+rate_limited_requests = Counter(
+    "rate_limited_requests_total", "Requests rejected by a rate limiter", ["scope"]
+)
+
+cache_requests = Counter(
+    "cache_requests_total", "Cache lookups by cache and outcome", ["cache", "result"]
+)
@@ -1,5 +1,6 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 
 # logger = logging.getLogger("uvicorn.access")
@@ -28,6 +29,8 @@ def register_middleware(app: FastAPI):
         allow_credentials=True,
     )
 
+    app.add_middleware(GZipMiddleware, minimum_size=1000)
+
     app.add_middleware(
         TrustedHostMiddleware,
         allowed_hosts=["localhost", "127.0.0.1", "testserver"],
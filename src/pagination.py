@@ -0,0 +1,24 @@
+import base64
+import json
+from typing import Any, List
+
+from src.errors import InvalidCursorError
+
+
+def encode_cursor(values: List[Any]) -> str:
+    payload = json.dumps(values, default=str, separators=(",", ":"))
+
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        raise InvalidCursorError()
+
+    if not isinstance(values, list) or len(values) != size:
+        raise InvalidCursorError()
+
+    return values
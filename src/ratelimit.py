@@ -0,0 +1,169 @@
+import logging
+import math
+import time
+
+from fastapi import Depends, Request
+from redis.exceptions import RedisError
+
+from src.auth.dependencies import AccessTokenBearer
+from src.cache import MISSING, LocalCache
+from src.config import Config
+from src.database import redis as redis_store
+from src.errors import RateLimitExceededError
+from src.metrics import rate_limited_requests
+
+# Refills the bucket for the time since its last use, then takes ``cost``
+# tokens if there are enough. Returns whether the request is allowed and,
+# if not, the seconds until it would be (as a string, since Redis truncates
+# Lua numbers to integers).
+BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'at')
+local tokens = tonumber(bucket[1]) or burst
+local at = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(0, now - at) * rate)
+
+local allowed = 0
+local retry_after = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+else
+    retry_after = (cost - tokens) / rate
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'at', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return {allowed, tostring(retry_after)}
+"""
+
+# Registered once: calls send EVALSHA, loading the script on first use. The
+# client is passed on each call so it follows redis_store.redis_client.
+token_bucket = redis_store.redis_client.register_script(BUCKET_SCRIPT)
+
+# Clients Redis has turned away are turned away locally until they may retry.
+LOCAL_MAXSIZE = 10000
+LOCAL_TTL = 60
+
+_blocked = LocalCache(LOCAL_MAXSIZE, LOCAL_TTL)
+# Each worker's own copy of every bucket, fed only by the requests it serves.
+# A bucket left unused for LOCAL_TTL starts full again, which only makes the
+# pre-check more lenient.
+_local = LocalCache(LOCAL_MAXSIZE, LOCAL_TTL)
+
+
+def client_ip(request: Request) -> str:
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimiter:
+    """Token bucket of ``burst`` requests refilled at ``per_minute``.
+
+    The bucket is kept in Redis so every worker shares it. ``scope`` names
+    the bucket; the route path is appended, so one limiter guarding several
+    routes gives each its own bucket. Requests are allowed when Redis is
+    unavailable.
+
+    Before asking Redis, each worker checks its own copy of the bucket: if the
+    requests it served alone exceed the limit, the shared bucket is empty too
+    and the client is rejected without a round trip. Requests within the
+    limit still cost one EVALSHA each, since only Redis sees the other
+    workers' traffic.
+    """
+
+    def __init__(self, scope: str, per_minute: int, burst: int):
+        self.scope = scope
+        self.rate = per_minute / 60
+        self.burst = burst
+
+    async def __call__(self, request: Request) -> None:
+        await self.check(request, client_ip(request))
+
+    async def check(self, request: Request, client: str, cost: int = 1) -> None:
+        route = request.scope.get("route")
+        key = f"ratelimit:{self.scope}:{getattr(route, 'path', request.url.path)}:{client}"
+
+        blocked_until = _blocked.get(key)
+        if blocked_until is not MISSING and blocked_until > time.monotonic():
+            self._reject(blocked_until - time.monotonic())
+
+        local_retry_after = self._take_local(key, cost)
+        if local_retry_after:
+            self._reject(local_retry_after)
+
+        try:
+            allowed, retry_after = await token_bucket(
+                keys=[key],
+                args=[self.rate, self.burst, cost],
+                client=redis_store.redis_client,
+            )
+        except RedisError as e:
+            logging.warning(f"Rate limiter unavailable: {e}")
+            self._refund_local(key, cost)
+            return
+
+        if not allowed:
+            # Only requests that took shared tokens stay charged locally,
+            # otherwise this copy could run dry while the shared bucket is not.
+            self._refund_local(key, cost)
+            retry_after = float(retry_after)
+            _blocked.set(key, time.monotonic() + retry_after)
+            self._reject(retry_after)
+
+    def _take_local(self, key: str, cost: int) -> float:
+        # The same refill as BUCKET_SCRIPT, on this worker's clock. Returns 0
+        # once the tokens are taken, or the seconds until there are enough.
+        now = time.monotonic()
+        bucket = _local.get(key)
+        tokens, at = (self.burst, now) if bucket is MISSING else bucket
+        tokens = min(self.burst, tokens + (now - at) * self.rate)
+
+        if tokens < cost:
+            _local.set(key, (tokens, now))
+            return (cost - tokens) / self.rate
+
+        _local.set(key, (tokens - cost, now))
+        return 0
+
+    def _refund_local(self, key: str, cost: int) -> None:
+        bucket = _local.get(key)
+        if bucket is not MISSING:
+            tokens, at = bucket
+            _local.set(key, (min(self.burst, tokens + cost), at))
+
+    def _reject(self, retry_after: float) -> None:
+        rate_limited_requests.labels(self.scope).inc()
+        raise RateLimitExceededError(max(1, math.ceil(retry_after)))
+
+
+class UserRateLimiter(RateLimiter):
+    """Per-user variant for authenticated routes."""
+
+    async def __call__(
+        self, request: Request, token_details: dict = Depends(AccessTokenBearer())
+    ) -> None:
+        await self.check(request, token_details["user"]["user_uid"])
+
+
+login_rate_limit = RateLimiter(
+    "login", Config.LOGIN_RATE_PER_MINUTE, Config.LOGIN_RATE_BURST
+)
+# Keyed by the account instead of the IP, so attempts on one account spread
+# over many addresses are limited too.
+login_account_rate_limit = RateLimiter(
+    "login_account",
+    Config.LOGIN_ACCOUNT_RATE_PER_MINUTE,
+    Config.LOGIN_ACCOUNT_RATE_BURST,
+)
+# Anything that sends email; each recipient costs a token.
+mail_rate_limit = RateLimiter(
+    "mail", Config.MAIL_RATE_PER_MINUTE, Config.MAIL_RATE_BURST
+)
+api_rate_limit = UserRateLimiter(
+    "api", Config.API_RATE_PER_MINUTE, Config.API_RATE_BURST
+)
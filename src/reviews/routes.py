@@ -1,14 +1,24 @@
-from typing import List
+from typing import List, Optional
 
-from fastapi import APIRouter, Depends, status
+from fastapi import APIRouter, Body, Depends, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.auth.dependencies import RoleChecker, get_current_active_user
+from src.auth.dependencies import RoleChecker, get_current_principal
+from src.auth.schemas import PrincipalModel
+from src.config import Config
 from src.database.main import get_session
-from src.database.models import User
+from src.database.models import Review, table
 from src.errors import ReviewNotFoundError
+from src.etag import is_not_modified, make_etag, not_modified_response
+from src.export import MEDIA_TYPES, ExportFormat, export_rows
 
-from .schemas import ReviewCreateModel, ReviewModel
+from .schemas import (
+    ReviewBulkResultModel,
+    ReviewCreateModel,
+    ReviewModel,
+    ReviewPageModel,
+)
 from .service import ReviewService
 
 review_service = ReviewService()
@@ -18,21 +28,88 @@ user_role_checker = Depends(RoleChecker(["user", "admin"]))
 
 
 @review_router.get(
-    "/", response_model=List[ReviewModel], dependencies=[user_role_checker]
+    "/", response_model=ReviewPageModel, dependencies=[user_role_checker]
+)
+async def get_all_reviews(
+    request: Request,
+    response: Response,
+    limit: int = Query(default=Config.DEFAULT_PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_session),
+):
+    reviews, next_cursor = await review_service.get_all_reviews(session, limit, cursor)
+
+    etag = make_etag(
+        *(f"{review.uid}:{review.updated_at}" for review in reviews), next_cursor
+    )
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers["ETag"] = etag
+
+    return {"items": reviews, "next_cursor": next_cursor}
+
+
+@review_router.get(
+    "/book/{book_uid}", response_model=ReviewPageModel, dependencies=[user_role_checker]
 )
-async def get_all_reviews(session: AsyncSession = Depends(get_session)):
-    reviews = await review_service.get_all_reviews(session)
+async def get_book_reviews(
+    book_uid: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(default=Config.DEFAULT_PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    min_rating: Optional[int] = Query(default=None, ge=0, le=5),
+    session: AsyncSession = Depends(get_session),
+):
+    reviews, next_cursor = await review_service.get_book_reviews(
+        book_uid, session, limit, cursor, min_rating
+    )
+
+    etag = make_etag(
+        *(f"{review.uid}:{review.updated_at}" for review in reviews), next_cursor
+    )
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers["ETag"] = etag
 
-    return reviews
+    return {"items": reviews, "next_cursor": next_cursor}
+
+
+@review_router.get("/export", dependencies=[user_role_checker])
+async def export_reviews(
+    export_format: ExportFormat = Query(default=ExportFormat.NDJSON, alias="format"),
+):
+    return StreamingResponse(
+        export_rows(
+            review_service.stream_reviews,
+            list(table(Review).columns.keys()),
+            export_format,
+        ),
+        media_type=MEDIA_TYPES[export_format],
+        headers={
+            "Content-Disposition": f'attachment; filename="reviews.{export_format.value}"'
+        },
+    )
 
 
 @review_router.get(
     "/{review_uid}", response_model=ReviewModel, dependencies=[user_role_checker]
 )
-async def get_review(review_uid: str, session: AsyncSession = Depends(get_session)):
-    review = await review_service.get_review(review_uid, session)
+async def get_review(
+    review_uid: str,
+    request: Request,
+    response: Response,
+    session: AsyncSession = Depends(get_session),
+):
+    review = await review_service.get_review_details(review_uid, session)
     if not review:
         raise ReviewNotFoundError()
+
+    etag = make_etag(review.uid, review.updated_at)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers["ETag"] = etag
+
     return review
 
 
@@ -43,15 +120,28 @@ async def create_review_to_book(
     book_uid: str,
     review_data: ReviewCreateModel,
     session: AsyncSession = Depends(get_session),
-    current_user: User = Depends(get_current_active_user),
+    current_user: PrincipalModel = Depends(get_current_principal),
 ):
     new_review = await review_service.add_review_to_book(
-        current_user.email, book_uid, review_data, session
+        current_user.uid, book_uid, review_data, session
     )
 
     return new_review
 
 
+@review_router.post(
+    "/bulk", response_model=ReviewBulkResultModel, dependencies=[user_role_checker]
+)
+async def create_reviews(
+    rows: List[dict] = Body(max_length=Config.BULK_MAX_REVIEWS),
+    session: AsyncSession = Depends(get_session),
+    current_user: PrincipalModel = Depends(get_current_principal),
+):
+    return await review_service.add_reviews(
+        current_user.uid, rows, session, Config.BULK_CHUNK_SIZE, Config.BULK_MAX_ERRORS
+    )
+
+
 @review_router.delete(
     "/{review_uid}",
     dependencies=[user_role_checker],
@@ -59,7 +149,7 @@ async def create_review_to_book(
 )
 async def delete_review(
     review_uid: str,
-    current_user: User = Depends(get_current_active_user),
+    current_user: PrincipalModel = Depends(get_current_principal),
     session: AsyncSession = Depends(get_session),
 ):
     await review_service.delete_review_to_form_book(
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, Field
 
@@ -15,6 +15,26 @@ class ReviewModel(BaseModel):
     updated_at: datetime
 
 
+class ReviewPageModel(BaseModel):
+    items: List[ReviewModel]
+    next_cursor: Optional[str]
+
+
 class ReviewCreateModel(BaseModel):
     rating: int = Field(le=5)
     review_text: str
+
+
+class ReviewBulkCreateModel(ReviewCreateModel):
+    book_uid: uuid.UUID
+
+
+class ReviewBulkErrorModel(BaseModel):
+    index: int
+    errors: List[dict]
+
+
+class ReviewBulkResultModel(BaseModel):
+    inserted: int
+    failed: int
+    errors: List[ReviewBulkErrorModel]
@@ -1,60 +1,316 @@
-import logging
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from fastapi import HTTPException, status
-from sqlmodel import desc, select
+from pydantic import ValidationError
+from sqlalchemy import RowMapping, insert, true, tuple_
+from sqlalchemy import select as core_select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+from sqlmodel import col, desc, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.auth.service import UserService
-from src.books.service import BookService
-from src.database.models import Review
+from src.books.leaderboard import leaderboard
+from src.books.ratings import decrement_rating_count, increment_rating_counts
+from src.books.service import BookService, book_cache, review_stats_update
+from src.cache import TwoTierCache
+from src.database.main import execute
+from src.database.models import Book, Review, table
+from src.errors import BookNotFoundError, InvalidCursorError, UserNotFoundError
+from src.export import EXPORT_BATCH_SIZE
+from src.pagination import decode_cursor, encode_cursor
 
-from .schemas import ReviewCreateModel
+from .schemas import ReviewBulkCreateModel, ReviewCreateModel, ReviewModel
 
 book_service = BookService()
 user_service = UserService()
+review_cache = TwoTierCache("review", ReviewModel)
+
+BOOK_FOREIGN_KEY = "reviews_book_uid_fkey"
+USER_FOREIGN_KEY = "reviews_user_uid_fkey"
+FOREIGN_KEY_FIELDS = {BOOK_FOREIGN_KEY: "book_uid", USER_FOREIGN_KEY: "user_uid"}
+
+
+def _rating_count(values: dict) -> dict:
+    return {"book_uid": values["book_uid"], "rating": values["rating"], "count": 1}
+
+
+def _constraint_name(error: IntegrityError) -> Optional[str]:
+    # asyncpg reports the violated constraint on its own exception, which
+    # SQLAlchemy's adapter keeps as the cause of ``orig``.
+    for exc in (error.orig, getattr(error.orig, "__cause__", None)):
+        name = getattr(exc, "constraint_name", None)
+        if name:
+            return name
+    return None
 
 
 class ReviewService:
     async def add_review_to_book(
         self,
-        user_email: str,
+        user_uid: uuid.UUID,
         book_uid: str,
         review_data: ReviewCreateModel,
         session: AsyncSession,
-    ):
+    ) -> dict:
+        try:
+            uid = uuid.UUID(book_uid)
+        except ValueError:
+            raise BookNotFoundError()
+
+        now = datetime.now()
+        values = {
+            "uid": uuid.uuid4(),
+            **review_data.model_dump(),
+            "user_uid": user_uid,
+            "book_uid": uid,
+            "created_at": now,
+            "updated_at": now,
+        }
+
         try:
-            book = await book_service.get_book(book_uid, session)
-            user = await user_service.get_user_by_email(user_email, session)
+            if session.bind.dialect.name == "postgresql":
+                review = await self._insert_with_stats(values, session)
+            else:
+                review = await self._insert_then_update_stats(values, session)
+        except IntegrityError as e:
+            await session.rollback()
+            # The foreign keys check that the book and the author exist.
+            if _constraint_name(e) == USER_FOREIGN_KEY:
+                raise UserNotFoundError()
+            raise BookNotFoundError()
+
+        await session.commit()
+
+        # Cached under the canonical form, whatever the path spelled.
+        await book_cache.invalidate(str(uid))
+        await leaderboard.record(
+            uid, review.pop("review_count"), review.pop("avg_rating"), now.date(), 1
+        )
+
+        return review
+
+    async def _insert_with_stats(self, values: dict, session: AsyncSession) -> dict:
+        # One statement: the review insert and the book's aggregate update run
+        # as sibling CTEs, so nothing is read before writing.
+        stats = (
+            review_stats_update(values["book_uid"], 1, values["rating"])
+            .returning(Book.review_count, Book.avg_rating)
+            .cte("stats")
+        )
+        reviews = table(Review)
+        inserted = (
+            insert(reviews).values(**values).returning(*reviews.columns).cte("inserted")
+        )
+        counts = increment_rating_counts("postgresql", [_rating_count(values)]).cte(
+            "counts"
+        )
+        statement = (
+            core_select(inserted, stats.c.review_count, stats.c.avg_rating)
+            .join(stats, true())
+            .add_cte(counts)
+        )
+
+        result = await execute(session, statement)
+
+        return dict(result.mappings().one())
 
-            review_data_dict = review_data.model_dump()
+    async def _insert_then_update_stats(
+        self, values: dict, session: AsyncSession
+    ) -> dict:
+        # SQLite has no data-modifying CTEs and does not enforce foreign keys
+        # by default, so a missing book shows up as an update of no rows.
+        await execute(session, insert(table(Review)).values(**values))
+        await execute(
+            session,
+            increment_rating_counts(session.bind.dialect.name, [_rating_count(values)]),
+        )
 
-            new_review = Review(**review_data_dict)
+        stats = await book_service.apply_review_stats(
+            values["book_uid"], 1, values["rating"], session
+        )
+        if stats is None:
+            await session.rollback()
+            raise BookNotFoundError()
 
-            if not user:
-                raise HTTPException(
-                    detail="User not found", status_code=status.HTTP_404_NOT_FOUND
+        review_count, avg_rating = stats
+        return {**values, "review_count": review_count, "avg_rating": avg_rating}
+
+    async def add_reviews(
+        self,
+        user_uid: uuid.UUID,
+        rows: List[dict],
+        session: AsyncSession,
+        chunk_size: int,
+        max_errors: int,
+    ) -> dict:
+        report: dict = {"inserted": 0, "failed": 0, "errors": []}
+
+        def reject(index: int, errors: list):
+            report["failed"] += 1
+            if len(report["errors"]) < max_errors:
+                report["errors"].append({"index": index, "errors": errors})
+
+        now = datetime.now()
+        valid: List[Tuple[int, dict]] = []
+        for index, row in enumerate(rows):
+            try:
+                review_data = ReviewBulkCreateModel.model_validate(row)
+            except ValidationError as e:
+                reject(
+                    index,
+                    e.errors(
+                        include_url=False, include_context=False, include_input=False
+                    ),
                 )
+                continue
+            values = {
+                "uid": uuid.uuid4(),
+                **review_data.model_dump(),
+                "user_uid": user_uid,
+                "created_at": now,
+                "updated_at": now,
+            }
+            valid.append((index, values))
+
+        known = await self._existing_books(
+            {values["book_uid"] for _, values in valid}, session, chunk_size
+        )
 
-            if not book:
-                raise HTTPException(
-                    detail="User not found", status_code=status.HTTP_404_NOT_FOUND
+        pending: List[Tuple[int, dict]] = []
+        for index, values in valid:
+            if values["book_uid"] in known:
+                pending.append((index, values))
+            else:
+                reject(
+                    index,
+                    [
+                        {
+                            "loc": ["book_uid"],
+                            "msg": "Book not found",
+                            "type": "not_found",
+                        }
+                    ],
                 )
 
-            new_review.user = user
-            new_review.book = book
+        inserted: List[dict] = []
+        for start in range(0, len(pending), chunk_size):
+            inserted += await self._insert_chunk(
+                pending[start : start + chunk_size], session, reject
+            )
+
+        stats = await self._apply_bulk_stats(inserted, session, chunk_size)
 
-            session.add(new_review)
+        await session.commit()
+
+        report["inserted"] = len(inserted)
 
-            await session.commit()
+        await book_cache.invalidate(*(str(book_uid) for book_uid in stats))
+        for book_uid, (review_count, avg_rating, added) in stats.items():
+            await leaderboard.record(
+                book_uid, review_count, avg_rating, now.date(), added
+            )
 
-            return new_review
+        return report
 
-        except Exception as e:
-            logging.error(f"Error adding review: {e}")
-            raise HTTPException(
-                detail="Oops... something went wrong!",
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+    async def _existing_books(
+        self, book_uids: set, session: AsyncSession, chunk_size: int
+    ) -> set:
+        # One IN query per chunk of distinct books, which for any batch up to
+        # ``chunk_size`` books is a single query.
+        uids = list(book_uids)
+        known: set = set()
+        for start in range(0, len(uids), chunk_size):
+            result = await session.exec(
+                select(Book.uid).where(
+                    col(Book.uid).in_(uids[start : start + chunk_size])
+                )
             )
+            known.update(result.all())
+        return known
+
+    async def _insert_chunk(
+        self, chunk: List[Tuple[int, dict]], session: AsyncSession, reject
+    ) -> List[dict]:
+        # One executemany per chunk inside a savepoint. If the database refuses
+        # it, the rows are retried one by one so only the failing ones are
+        # reported. The savepoint is only emitted once the session hands out a
+        # connection, so it is fetched inside each block.
+        try:
+            async with session.begin_nested():
+                connection = await session.connection()
+                await connection.execute(
+                    insert(table(Review)), [values for _, values in chunk]
+                )
+            return [values for _, values in chunk]
+        except SQLAlchemyError:
+            pass
+
+        inserted = []
+        for index, values in chunk:
+            try:
+                async with session.begin_nested():
+                    connection = await session.connection()
+                    await connection.execute(insert(table(Review)), [values])
+            except SQLAlchemyError as e:
+                # A book deleted since it was resolved, or the author's account.
+                name = _constraint_name(e) if isinstance(e, IntegrityError) else None
+                field = FOREIGN_KEY_FIELDS.get(name) if name else None
+                if field:
+                    reject(
+                        index,
+                        [{"loc": [field], "msg": "Not found", "type": "not_found"}],
+                    )
+                    continue
+                reject(
+                    index,
+                    [
+                        {
+                            "loc": [],
+                            "msg": "Rejected by the database",
+                            "type": "database_error",
+                        }
+                    ],
+                )
+                continue
+            inserted.append(values)
+        return inserted
+
+    async def _apply_bulk_stats(
+        self, inserted: List[dict], session: AsyncSession, chunk_size: int
+    ) -> Dict[uuid.UUID, Tuple[int, float, int]]:
+        # One aggregate update per affected book, whatever the number of its
+        # new reviews.
+        added: Counter = Counter()
+        rating_sums: Counter = Counter()
+        cells: Counter = Counter()
+        for values in inserted:
+            added[values["book_uid"]] += 1
+            rating_sums[values["book_uid"]] += values["rating"]
+            cells[values["book_uid"], values["rating"]] += 1
+
+        stats = {}
+        for book_uid, count in added.items():
+            book_stats = await book_service.apply_review_stats(
+                book_uid, count, rating_sums[book_uid], session
+            )
+            if book_stats is not None:
+                stats[book_uid] = (*book_stats, count)
+
+        rating_counts = [
+            {"book_uid": book_uid, "rating": rating, "count": count}
+            for (book_uid, rating), count in cells.items()
+        ]
+        for start in range(0, len(rating_counts), chunk_size):
+            await session.exec(
+                increment_rating_counts(
+                    session.bind.dialect.name, rating_counts[start : start + chunk_size]
+                )
+            )
+
+        return stats
 
     async def get_review(self, review_uid: str, session: AsyncSession):
         statement = select(Review).where(Review.uid == review_uid)
@@ -63,12 +319,86 @@ class ReviewService:
 
         return result.first()
 
-    async def get_all_reviews(self, session: AsyncSession):
-        statement = select(Review).order_by(desc(Review.created_at))
+    async def get_review_details(
+        self, review_uid: str, session: AsyncSession
+    ) -> Optional[ReviewModel]:
+        try:
+            key = str(uuid.UUID(review_uid))
+        except ValueError:
+            return None
+
+        return await review_cache.get_or_load(
+            key, lambda: self.get_review(review_uid, session)
+        )
+
+    async def get_all_reviews(
+        self, session: AsyncSession, limit: int, cursor: Optional[str] = None
+    ) -> Tuple[List[Review], Optional[str]]:
+        return await self._paginate(select(Review), session, limit, cursor)
+
+    async def get_book_reviews(
+        self,
+        book_uid: str,
+        session: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+        min_rating: Optional[int] = None,
+    ) -> Tuple[List[Review], Optional[str]]:
+        try:
+            uid = uuid.UUID(book_uid)
+        except ValueError:
+            raise BookNotFoundError()
+
+        result = await session.exec(select(Book.uid).where(Book.uid == uid))
+        if result.first() is None:
+            raise BookNotFoundError()
+
+        statement = select(Review).where(Review.book_uid == uid)
+        if min_rating is not None:
+            statement = statement.where(Review.rating >= min_rating)
+
+        return await self._paginate(statement, session, limit, cursor)
+
+    async def _paginate(
+        self, statement, session: AsyncSession, limit: int, cursor: Optional[str]
+    ) -> Tuple[List[Review], Optional[str]]:
+        if cursor:
+            created_at, uid = decode_cursor(cursor, 2)
+            try:
+                after = (datetime.fromisoformat(created_at), uuid.UUID(uid))
+            except (TypeError, ValueError):
+                raise InvalidCursorError()
+            statement = statement.where(
+                tuple_(col(Review.created_at), col(Review.uid)) < after
+            )
+
+        statement = statement.order_by(desc(Review.created_at), desc(Review.uid)).limit(
+            limit + 1
+        )
 
         result = await session.exec(statement)
 
-        return result.all()
+        reviews = result.all()
+
+        next_cursor = None
+        if len(reviews) > limit:
+            reviews = reviews[:limit]
+            last = reviews[-1]
+            next_cursor = encode_cursor([last.created_at.isoformat(), str(last.uid)])
+
+        return reviews, next_cursor
+
+    async def stream_reviews(self, session: AsyncSession) -> AsyncIterator[RowMapping]:
+        statement = (
+            select(*table(Review).columns)
+            .order_by(col(Review.created_at), col(Review.uid))
+            .execution_options(yield_per=EXPORT_BATCH_SIZE)
+        )
+
+        result = await session.stream(statement)
+
+        async for row in result.mappings():
+            yield row
 
     async def delete_review_to_form_book(
         self, review_uid: str, user_email: str, session: AsyncSession
@@ -85,4 +415,16 @@ class ReviewService:
 
         await session.delete(review)
 
+        stats = await book_service.apply_review_stats(
+            review.book_uid, -1, -review.rating, session
+        )
+        await session.exec(decrement_rating_count(review.book_uid, review.rating))
+
         await session.commit()
+
+        await review_cache.invalidate(str(review.uid))
+        await book_cache.invalidate(str(review.book_uid))
+        if stats:
+            await leaderboard.record(
+                review.book_uid, *stats, review.created_at.date(), -1
+            )
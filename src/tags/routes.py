@@ -1,11 +1,22 @@
-from typing import List
-
-from fastapi import APIRouter, Depends, status
+from typing import List, Optional
+
+from fastapi import (
+    APIRouter,
+    BackgroundTasks,
+    Depends,
+    Query,
+    Request,
+    Response,
+    status,
+)
 from sqlmodel.ext.asyncio.session import AsyncSession
 
 from src.auth.dependencies import RoleChecker
-from src.books.schemas import BookModel
+from src.books.schemas import BookModel, BookPageModel, BookSort
+from src.celery_tasks import update_book_similarities
+from src.config import Config
 from src.database.main import get_session
+from src.etag import is_not_modified, make_etag, not_modified_response
 
 from .schemas import TagAddModel, TagCreateModel, TagModel
 from .service import TagService
@@ -16,9 +27,16 @@ user_role_checker = Depends(RoleChecker(["user", "admin"]))
 
 
 @tags_router.get("/", response_model=List[TagModel], dependencies=[user_role_checker])
-async def get_all_tags(session: AsyncSession = Depends(get_session)):
+async def get_all_tags(
+    request: Request, response: Response, session: AsyncSession = Depends(get_session)
+):
     tags = await tag_service.get_tags(session)
 
+    etag = make_etag(*(f"{tag.uid}:{tag.name}" for tag in tags))
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers["ETag"] = etag
+
     return tags
 
 
@@ -38,13 +56,46 @@ async def create_tag(tag: TagCreateModel, session: AsyncSession = Depends(get_se
     "/book/{book_uid}/tags", response_model=BookModel, dependencies=[user_role_checker]
 )
 async def add_tag_to_book(
-    tag_data: TagAddModel, book_uid: str, session: AsyncSession = Depends(get_session)
+    tag_data: TagAddModel,
+    book_uid: str,
+    background_tasks: BackgroundTasks,
+    session: AsyncSession = Depends(get_session),
 ):
     book_with_tag = await tag_service.add_tag_to_book(book_uid, tag_data, session)
+    # .delay() talks to the broker synchronously, so it runs in the threadpool
+    # once the response is sent rather than on the event loop.
+    background_tasks.add_task(update_book_similarities.delay, str(book_with_tag.uid))
 
     return book_with_tag
 
 
+@tags_router.get(
+    "/{tag_uid}/books",
+    response_model=BookPageModel,
+    response_model_exclude_unset=True,
+    dependencies=[user_role_checker],
+)
+async def get_tag_books(
+    tag_uid: str,
+    request: Request,
+    response: Response,
+    limit: int = Query(default=Config.DEFAULT_PAGE_SIZE, ge=1, le=Config.MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    sort: BookSort = BookSort.NEWEST,
+    session: AsyncSession = Depends(get_session),
+):
+    books, next_cursor = await tag_service.get_tag_books(
+        tag_uid, session, limit, cursor, sort
+    )
+
+    etag = make_etag(*(f"{book.uid}:{book.version}" for book in books), next_cursor)
+    if is_not_modified(request, etag):
+        return not_modified_response(etag)
+    response.headers["ETag"] = etag
+
+    return {"items": [book.model_dump() for book in books], "next_cursor": next_cursor}
+
+
 @tags_router.put(
     "/{tag_uid}", response_model=TagModel, dependencies=[user_role_checker]
 )
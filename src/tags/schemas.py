@@ -9,6 +9,7 @@ class TagModel(BaseModel):
     uid: uuid.UUID
     name: str
     created_at: datetime
+    version: int
 
 
 class TagCreateModel(BaseModel):
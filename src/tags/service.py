@@ -1,21 +1,59 @@
-from sqlmodel import desc, select
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import delete
+from sqlmodel import col, desc, select
 from sqlmodel.ext.asyncio.session import AsyncSession
 
-from src.books.service import BookService
-from src.database.models import Tag
+from src.books.schemas import BookModel, BookSort
+from src.books.service import BookService, book_cache
+from src.cache import TwoTierCache
+from src.database.main import execute
+from src.database.models import Book, BookTag, Tag
 from src.errors import (
     BookNotFoundError,
     TagAlreadyExistsError,
     TagNotFoundError,
 )
 
-from .schemas import TagAddModel, TagCreateModel
+from .schemas import TagAddModel, TagCreateModel, TagModel
 
 book_service = BookService()
+tags_cache = TwoTierCache("tags", List[TagModel])
+ALL_TAGS = "all"
+
+# The tag list the map was built from; the cache hands back the same list
+# until it changes.
+_tag_map: Tuple[Optional[List[TagModel]], Dict[uuid.UUID, TagModel]] = (None, {})
 
 
 class TagService:
-    async def get_tags(self, session: AsyncSession):
+    async def get_tags(self, session: AsyncSession) -> List[TagModel]:
+        return await tags_cache.get_or_load(ALL_TAGS, lambda: self._load_tags(session))
+
+    async def get_tag_map(self, session: AsyncSession) -> Dict[uuid.UUID, TagModel]:
+        global _tag_map
+
+        tags = await self.get_tags(session)
+        if _tag_map[0] is not tags:
+            _tag_map = (tags, {tag.uid: tag for tag in tags})
+        return _tag_map[1]
+
+    async def with_current_tags(
+        self, book: BookModel, session: AsyncSession
+    ) -> BookModel:
+        """The book with its embedded tags as they are now.
+
+        Renaming or deleting a tag does not touch the books carrying it, so
+        cached books may hold old names or deleted tags.
+        """
+        tags = await self.get_tag_map(session)
+        current = [tags[tag.uid] for tag in book.tags if tag.uid in tags]
+        if current == book.tags:
+            return book
+        return book.model_copy(update={"tags": current})
+
+    async def _load_tags(self, session: AsyncSession):
         statement = select(Tag).order_by(desc(Tag.created_at))
 
         result = await session.exec(statement)
@@ -30,7 +68,13 @@ class TagService:
         if not book:
             raise BookNotFoundError()
 
+        names = {tag.name for tag in book.tags}
+        added = 0
         for tag_item in tag_data.tags:
+            if tag_item.name in names:
+                continue
+            names.add(tag_item.name)
+
             statement = select(Tag).where(Tag.name == tag_item.name)
 
             result = await session.exec(statement)
@@ -38,20 +82,53 @@ class TagService:
             tag = result.one_or_none()
 
             if not tag:
-                tag = Tag(**tag_data.model_dump())
+                tag = Tag(name=tag_item.name)
 
             book.tags.append(tag)
-            await session.commit()
-            await session.refresh(book)
+            added += 1
+
+        if not added:
             return book
 
+        # One version bump and one invalidation for all the added tags.
+        await book_service.bump_versions(Book.uid == book.uid, session)
+        await session.commit()
+        await tags_cache.invalidate(ALL_TAGS)
+        await book_cache.invalidate(str(book.uid))
+        await session.refresh(book)
+        return book
+
     async def get_tag_by_uid(self, tag_uid: str, session: AsyncSession):
-        statement = select(Tag).where(Tag.uid == tag_uid)
+        try:
+            uid = uuid.UUID(tag_uid)
+        except ValueError:
+            return None
+
+        statement = select(Tag).where(Tag.uid == uid)
 
         result = await session.exec(statement)
 
         return result.first()
 
+    async def get_tag_books(
+        self,
+        tag_uid: str,
+        session: AsyncSession,
+        limit: int,
+        cursor: Optional[str] = None,
+        sort: BookSort = BookSort.NEWEST,
+    ):
+        try:
+            uid = uuid.UUID(tag_uid)
+        except ValueError:
+            raise TagNotFoundError()
+
+        result = await session.exec(select(Tag.uid).where(Tag.uid == uid))
+        if result.first() is None:
+            raise TagNotFoundError()
+
+        return await book_service.get_tag_books(uid, session, limit, cursor, sort)
+
     async def create_tag(self, tag_data: TagCreateModel, session: AsyncSession):
         statement = select(Tag).where(Tag.name == tag_data.name)
 
@@ -66,6 +143,7 @@ class TagService:
 
         session.add(new_tag)
         await session.commit()
+        await tags_cache.invalidate(ALL_TAGS)
         return new_tag
 
     async def update_tag(
@@ -80,9 +158,12 @@ class TagService:
 
         for key, value in update_tag_data_dict.items():
             setattr(tag, key, value)
+        tag.version = Tag.version + 1
+
+        await session.commit()
+        await session.refresh(tag)
 
-            await session.commit()
-            await session.refresh(tag)
+        await tags_cache.invalidate(ALL_TAGS)
 
         return tag
 
@@ -92,5 +173,10 @@ class TagService:
         if not tag:
             raise TagNotFoundError
 
-        await session.delete(tag)
+        # Tag.books is never loaded, so the links are removed explicitly.
+        # Dropping a link changes the tagged books' ETags without a version
+        # bump, and cached copies drop the tag when they are read.
+        await execute(session, delete(BookTag).where(col(BookTag.tag_id) == tag.uid))
+        await execute(session, delete(Tag).where(col(Tag.uid) == tag.uid))
         await session.commit()
+        await tags_cache.invalidate(ALL_TAGS)
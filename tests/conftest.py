@@ -0,0 +1,43 @@
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from src.database.models import Book
+
+
+@pytest_asyncio.fixture
+async def session():
+    """A session on a fresh in-memory SQLite database with every table."""
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(SQLModel.metadata.create_all)
+
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            yield session
+    finally:
+        # A live aiosqlite thread keeps pytest from exiting.
+        await engine.dispose()
+
+
+@pytest.fixture
+def make_book():
+    def make_book(**fields) -> Book:
+        return Book(
+            **{
+                "title": "Book",
+                "author": "Author",
+                "publisher": "Test Publisher",
+                "published_date": date(2024, 1, 1),
+                "page_count": 123,
+                "language": "en",
+                **fields,
+            }
+        )
+
+    return make_book
@@ -1,8 +1,10 @@
+import uuid
+from unittest.mock import AsyncMock, MagicMock, patch
+
 import pytest
 from fastapi.testclient import TestClient
-from unittest.mock import AsyncMock, patch, MagicMock
+
 from src.__init__ import app
-import uuid
 
 client = TestClient(app)
 
@@ -41,3 +43,310 @@ def test_signup(user_data):
     resp = client.post("/api/v1/auth/signup", json=user_data)
     print(resp.status_code, resp.text)
     assert resp.status_code in (201, 400, 409, 422)
+
+
+def test_token_is_verified_once_per_request(monkeypatch):
+    from src.auth import dependencies
+    from src.auth.schemas import PrincipalModel
+    from src.auth.utils import create_access_token, decode_token
+
+    decode = MagicMock(side_effect=decode_token)
+    state = AsyncMock(return_value=(False, 0))
+    monkeypatch.setattr(dependencies, "decode_token", decode)
+    monkeypatch.setattr(dependencies.revocation_cache, "state", state)
+    monkeypatch.setattr(
+        dependencies.user_service,
+        "get_principal",
+        AsyncMock(
+            return_value=PrincipalModel(
+                uid=uuid.uuid4(),
+                email="reader@example.com",
+                role="user",
+                is_verified=True,
+            )
+        ),
+    )
+    monkeypatch.setattr(
+        "src.books.service.BookService.get_all_books",
+        AsyncMock(return_value=([], None)),
+    )
+    token = create_access_token(
+        user_data={"email": "reader@example.com", "user_uid": str(uuid.uuid4())}
+    )
+
+    resp = client.get("/api/v1/books/", headers={"Authorization": f"Bearer {token}"})
+
+    assert resp.status_code == 200
+    assert decode.call_count == 1
+    state.assert_awaited_once()
+
+
+def test_principal_is_cached_until_its_permissions_change(monkeypatch):
+    import asyncio
+
+    from src.auth.service import UserService, principal_cache
+    from src.database.models import User
+
+    user = User(
+        uid=uuid.uuid4(),
+        username="reader",
+        email="reader@example.com",
+        first_name="Read",
+        last_name="Er",
+        role="user",
+        is_verified=False,
+        password_hash="x",  # noqa: S106
+    )
+    row = MagicMock(
+        _mapping={
+            "uid": user.uid,
+            "email": user.email,
+            "role": user.role,
+            "is_verified": user.is_verified,
+        }
+    )
+    session = MagicMock(
+        exec=AsyncMock(return_value=MagicMock(first=MagicMock(return_value=row))),
+        commit=AsyncMock(),
+    )
+    epoch = AsyncMock(return_value=1)
+    monkeypatch.setattr("src.auth.service.bump_token_epoch", epoch)
+    service = UserService()
+    principal_cache.clear()
+
+    async def lookups():
+        first = await service.get_principal(user.uid, session)
+        second = await service.get_principal(user.uid, session)
+        await service.update_user(user, {"first_name": "Reid"}, session)
+        await service.get_principal(user.uid, session)
+        await service.update_user(user, {"is_verified": True}, session)
+        await service.get_principal(user.uid, session)
+        return first, second
+
+    first, second = asyncio.run(lookups())
+
+    assert first is second and first.role == "user"
+    assert session.exec.await_count == 2
+    epoch.assert_awaited_once_with(str(user.uid))
+
+
+def test_role_claims_authorize_until_the_epoch_moves(monkeypatch):
+    from src.auth import dependencies
+    from src.auth.utils import create_access_token
+
+    principal = AsyncMock()
+    monkeypatch.setattr(dependencies.user_service, "get_principal", principal)
+    monkeypatch.setattr(
+        "src.books.service.BookService.get_all_books",
+        AsyncMock(return_value=([], None)),
+    )
+    token = create_access_token(
+        user_data={
+            "email": "reader@example.com",
+            "user_uid": str(uuid.uuid4()),
+            "role": "user",
+            "is_verified": True,
+        },
+        epoch=3,
+    )
+    headers = {"Authorization": f"Bearer {token}"}
+
+    monkeypatch.setattr(
+        dependencies.revocation_cache, "state", AsyncMock(return_value=(False, 3))
+    )
+    assert client.get("/api/v1/books/", headers=headers).status_code == 200
+    principal.assert_not_awaited()
+
+    monkeypatch.setattr(
+        dependencies.revocation_cache, "state", AsyncMock(return_value=(False, 4))
+    )
+    resp = client.get("/api/v1/books/", headers=headers)
+    assert resp.status_code == 401
+    assert resp.json()["error_code"] == "token_revoked"
+
+
+def test_revocations_are_answered_locally_once_synced(monkeypatch):
+    import asyncio
+
+    from src.auth.revocations import RevocationCache
+
+    token_state = AsyncMock(return_value=(True, 2))
+    monkeypatch.setattr("src.database.redis.token_state", token_state)
+    cache = RevocationCache()
+
+    async def checks():
+        unsynced = await cache.state("jti-1", "user-1")
+        cache.synced = True
+        cache.apply({"jti": "jti-1", "ttl": 60})
+        cache.apply({"jti": "jti-2", "ttl": -1})
+        cache.apply({"user_uid": "user-1", "epoch": 3})
+        cache.apply({"user_uid": "user-1", "epoch": 2})
+        return (
+            unsynced,
+            await cache.state("jti-1", "user-1"),
+            await cache.state("jti-2", "user-2"),
+        )
+
+    unsynced, revoked, expired = asyncio.run(checks())
+
+    assert unsynced == (True, 2)
+    assert revoked == (True, 3)
+    assert expired == (False, 0)
+    token_state.assert_awaited_once()
+
+
+def test_login_rehashes_passwords_made_with_another_cost_factor(monkeypatch):
+    from src.auth import routes
+    from src.auth.utils import passwd_context
+    from src.database.models import User
+
+    user = User(
+        uid=uuid.uuid4(),
+        username="reader",
+        email="reader@example.com",
+        first_name="Read",
+        last_name="Er",
+        role="user",
+        is_verified=True,
+        password_hash=passwd_context.handler().using(rounds=4).hash("secret1"),
+    )
+    rehash = AsyncMock()
+    monkeypatch.setattr(
+        routes.user_service, "get_user_uid_by_email", AsyncMock(return_value=user.uid)
+    )
+    monkeypatch.setattr(
+        routes.user_service, "get_user_by_email", AsyncMock(return_value=user)
+    )
+    monkeypatch.setattr(routes.user_service, "rehash_password", rehash)
+    monkeypatch.setattr(routes, "get_token_epoch", AsyncMock(return_value=0))
+
+    resp = client.post(
+        "/api/v1/auth/login", json={"email": user.email, "password": "secret1"}
+    )
+
+    assert resp.status_code == 200
+    new_hash = rehash.await_args.args[1]
+    assert passwd_context.verify("secret1", new_hash)
+    assert not passwd_context.needs_update(new_hash)
+
+
+def test_login_reads_the_token_epoch_before_the_user_row(monkeypatch):
+    from src.auth import routes
+
+    reads = []
+
+    async def get_token_epoch(user_uid):
+        reads.append("epoch")
+        return 0
+
+    async def get_user_by_email(email, session):
+        reads.append("user")
+        return None
+
+    monkeypatch.setattr(
+        routes.user_service,
+        "get_user_uid_by_email",
+        AsyncMock(return_value=uuid.uuid4()),
+    )
+    monkeypatch.setattr(routes.user_service, "get_user_by_email", get_user_by_email)
+    monkeypatch.setattr(routes, "get_token_epoch", get_token_epoch)
+
+    client.post(
+        "/api/v1/auth/login",
+        json={"email": "reader@example.com", "password": "secret1"},
+    )
+
+    # A role change committed after the row is read then bumps a later epoch.
+    assert reads == ["epoch", "user"]
+
+
+def test_login_is_rate_limited_with_retry_after(monkeypatch):
+    from src.cache import LocalCache
+
+    token_bucket = AsyncMock(return_value=[0, b"2.5"])
+    monkeypatch.setattr("src.ratelimit.token_bucket", token_bucket)
+    monkeypatch.setattr("src.ratelimit._blocked", LocalCache(10, 60))
+    monkeypatch.setattr("src.ratelimit._local", LocalCache(10, 60))
+    login = {"email": "reader@example.com", "password": "secret1"}
+
+    first = client.post("/api/v1/auth/login", json=login)
+    second = client.post("/api/v1/auth/login", json=login)
+
+    assert first.status_code == second.status_code == 429
+    assert first.headers["Retry-After"] == "3"
+    assert first.json()["error_code"] == "rate_limit_exceeded"
+    # The second attempt is turned away without asking Redis again.
+    token_bucket.assert_awaited_once()
+    assert token_bucket.await_args.kwargs["keys"] == [
+        "ratelimit:login:/api/{version}/auth/login:testclient"
+    ]
+
+
+def test_login_is_limited_per_account(monkeypatch):
+    from src import ratelimit
+    from src.auth import routes
+    from src.cache import LocalCache
+
+    token_bucket = AsyncMock(return_value=[1, b"0"])
+    monkeypatch.setattr(ratelimit, "token_bucket", token_bucket)
+    monkeypatch.setattr(ratelimit, "_blocked", LocalCache(10, 60))
+    monkeypatch.setattr(ratelimit, "_local", LocalCache(10, 60))
+    monkeypatch.setattr(
+        routes.user_service, "get_user_uid_by_email", AsyncMock(return_value=None)
+    )
+    login = {"email": "Reader@Example.com", "password": "secret1"}
+
+    resp = client.post("/api/v1/auth/login", json=login)
+
+    assert resp.status_code != 429
+    assert [call.kwargs["keys"] for call in token_bucket.await_args_list] == [
+        ["ratelimit:login:/api/{version}/auth/login:testclient"],
+        ["ratelimit:login_account:/api/{version}/auth/login:reader@example.com"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_clients_over_the_limit_on_one_worker_skip_redis(monkeypatch):
+    from src import ratelimit
+    from src.cache import LocalCache
+    from src.errors import RateLimitExceededError
+
+    token_bucket = AsyncMock(return_value=[1, b"0"])
+    monkeypatch.setattr(ratelimit, "token_bucket", token_bucket)
+    monkeypatch.setattr(ratelimit, "_local", LocalCache(10, 60))
+    limiter = ratelimit.RateLimiter("test", per_minute=6, burst=2)
+    request = MagicMock(scope={}, url=MagicMock(path="/test"))
+
+    await limiter.check(request, "client")
+    await limiter.check(request, "client")
+    with pytest.raises(RateLimitExceededError) as rejected:
+        await limiter.check(request, "client")
+
+    # Two requests already used the burst here, so Redis is not asked again.
+    assert token_bucket.await_count == 2
+    assert rejected.value.retry_after == 10
+
+
+@pytest.mark.asyncio
+async def test_requests_redis_refused_are_refunded_locally(monkeypatch):
+    from redis.exceptions import RedisError
+
+    from src import ratelimit
+    from src.cache import LocalCache
+    from src.errors import RateLimitExceededError
+
+    token_bucket = AsyncMock(side_effect=[[0, b"1"], RedisError("down"), [1, b"0"]])
+    monkeypatch.setattr(ratelimit, "token_bucket", token_bucket)
+    monkeypatch.setattr(ratelimit, "_blocked", LocalCache(10, 60))
+    monkeypatch.setattr(ratelimit, "_local", LocalCache(10, 60))
+    limiter = ratelimit.RateLimiter("test", per_minute=6, burst=1)
+    request = MagicMock(scope={}, url=MagicMock(path="/test"))
+
+    with pytest.raises(RateLimitExceededError):
+        await limiter.check(request, "client")
+    ratelimit._blocked.clear()
+    await limiter.check(request, "client")
+    await limiter.check(request, "client")
+
+    # Neither the refusal nor the error spent this worker's only token.
+    assert token_bucket.await_count == 3
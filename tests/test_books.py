@@ -28,7 +28,9 @@ def override_dependencies():
     app.dependency_overrides[get_session] = fake_get_session
     with patch(
         "src.database.redis.token_block_list",
-        new=MagicMock(get=AsyncMock(return_value=None)),
+        new=MagicMock(
+            get=AsyncMock(return_value=None), mget=AsyncMock(return_value=[None, None])
+        ),
     ), patch("src.database.redis.add_jti_to_block_list", new=AsyncMock()), patch(
         "src.database.redis.token_in_blocklist", new=AsyncMock(return_value=False)
     ), patch(
@@ -87,12 +89,9 @@ def test_get_book_by_id_authenticated(auth_token, monkeypatch):
 
 
 def test_update_book_authenticated(auth_token, monkeypatch):
-    class FakeBook:
-        def model_dump(self):
-            return {"title": "Updated Book"}
-
     monkeypatch.setattr(
-        "src.books.service.BookService.update_book", AsyncMock(return_value=FakeBook())
+        "src.books.service.BookService.update_book",
+        AsyncMock(return_value={"title": "Updated Book", "version": 2}),
     )
     resp = client.patch(
         "/api/v1/books/fake-book-uid",
@@ -115,7 +114,8 @@ def test_delete_book_authenticated(auth_token, monkeypatch):
 
 def test_get_user_books_authenticated(auth_token, monkeypatch):
     monkeypatch.setattr(
-        "src.books.service.BookService.get_user_books", AsyncMock(return_value=[])
+        "src.books.service.BookService.get_user_books",
+        AsyncMock(return_value=([], None)),
     )
     resp = client.get(
         "/api/v1/books/user/fake-user-uid",
@@ -144,3 +144,603 @@ def mock_create_book_success(monkeypatch):
 
     monkeypatch.setattr(BookService, "create_book", AsyncMock(return_value=FakeBook()))
     yield
+
+
+def test_book_cursor_round_trip():
+    from src.pagination import decode_cursor, encode_cursor
+
+    cursor = encode_cursor(["2024-01-01T00:00:00", "fake-uid"])
+
+    assert decode_cursor(cursor, 2) == ["2024-01-01T00:00:00", "fake-uid"]
+
+
+def test_invalid_book_cursor_rejected():
+    from src.errors import InvalidCursorError
+    from src.pagination import decode_cursor
+
+    with pytest.raises(InvalidCursorError):
+        decode_cursor("not-a-cursor", 2)
+
+
+def test_book_expansion_parses_includes():
+    from src.books.routes import BookExpansion
+    from src.books.schemas import BookInclude
+
+    expansion = BookExpansion(include="reviews, tags", reviews_limit=5, tags_limit=10)
+
+    assert expansion.include == {BookInclude.REVIEWS, BookInclude.TAGS}
+
+
+def test_book_expansion_rejects_unknown_relation():
+    from fastapi import HTTPException
+
+    from src.books.routes import BookExpansion
+
+    with pytest.raises(HTTPException):
+        BookExpansion(include="reviews,author", reviews_limit=5, tags_limit=10)
+
+
+def test_import_books_reports_row_errors():
+    import asyncio
+    import uuid
+
+    from src.books.service import BookService
+
+    connection = MagicMock(execute=AsyncMock())
+    session = MagicMock(
+        connection=AsyncMock(return_value=connection),
+        commit=AsyncMock(),
+        rollback=AsyncMock(),
+    )
+
+    async def rows():
+        yield {
+            "title": "Test Book",
+            "author": "Test Author",
+            "publisher": "Test Publisher",
+            "published_date": "2024-01-01",
+            "page_count": 123,
+            "language": "fr",
+        }
+        yield {"title": "Missing Fields"}
+        yield b"{not json"
+
+    report = asyncio.run(
+        BookService().import_books(
+            rows(), str(uuid.uuid4()), session, chunk_size=1, max_errors=10
+        )
+    )
+
+    assert report["inserted"] == 1
+    assert report["failed"] == 2
+    assert [error["index"] for error in report["errors"]] == [1, 2]
+    connection.execute.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_import_books_retries_a_refused_chunk_row_by_row(session, monkeypatch):
+    import uuid
+
+    from sqlalchemy import text
+    from sqlmodel import select
+
+    from src.books.service import BookService
+    from src.database.models import Book
+
+    monkeypatch.setattr("src.books.service.suggest_index.add_many", MagicMock())
+    await session.exec(
+        text(
+            "CREATE TRIGGER refuse_title BEFORE INSERT ON books "
+            "WHEN NEW.title = 'Refused' BEGIN SELECT RAISE(ABORT, 'refused'); END"
+        )
+    )
+    await session.commit()
+
+    async def rows():
+        for title in ["First", "Refused", "Third"]:
+            yield {
+                "title": title,
+                "author": "Test Author",
+                "publisher": "Test Publisher",
+                "published_date": "2024-01-01",
+                "page_count": 123,
+                "language": "en",
+            }
+
+    report = await BookService().import_books(
+        rows(), str(uuid.uuid4()), session, chunk_size=3, max_errors=10
+    )
+    titles = (await session.exec(select(Book.title).order_by(Book.title))).all()
+
+    assert (report["inserted"], report["failed"]) == (2, 1)
+    assert report["errors"][0]["index"] == 1
+    assert "refused" in report["errors"][0]["errors"][0]["msg"]
+    assert titles == ["First", "Third"]
+
+
+def test_export_rows_streams_csv(monkeypatch):
+    import asyncio
+
+    from src import export
+
+    session = MagicMock()
+    session.__aenter__ = AsyncMock(return_value=session)
+    session.__aexit__ = AsyncMock(return_value=False)
+    monkeypatch.setattr(export, "Session", MagicMock(return_value=session))
+    monkeypatch.setattr(export, "EXPORT_BATCH_SIZE", 1)
+
+    async def rows(session):
+        yield {"title": "Test Book", "page_count": 123}
+        yield {"title": "Other Book", "page_count": 7}
+
+    async def collect():
+        stream = export.export_rows(
+            rows, ["title", "page_count"], export.ExportFormat.CSV
+        )
+        return [chunk async for chunk in stream]
+
+    chunks = asyncio.run(collect())
+
+    assert b"".join(chunks).decode().splitlines() == [
+        "title,page_count",
+        "Test Book,123",
+        "Other Book,7",
+    ]
+    assert len(chunks) == 3
+
+
+@pytest.mark.asyncio
+async def test_delete_books_removes_reviews_and_tag_links(session, make_book, monkeypatch):
+    import uuid
+
+    from sqlalchemy import func
+    from sqlmodel import select
+
+    from src.books.service import BookService
+    from src.database.models import Book, BookTag, Review, Tag
+
+    monkeypatch.setattr("src.books.service.book_cache.invalidate", AsyncMock())
+    invalidate_reviews = AsyncMock()
+    monkeypatch.setattr("src.reviews.service.review_cache.invalidate", invalidate_reviews)
+
+    books = [make_book(title=f"Book {i}") for i in range(3)]
+    tag = Tag(name="classic")
+    session.add_all([*books, tag])
+    await session.flush()
+    reviews = [Review(rating=4, review_text="Good", book_uid=book.uid) for book in books]
+    for book, review in zip(books, reviews):
+        session.add(review)
+        session.add(BookTag(book_id=book.uid, tag_id=tag.uid))
+    await session.commit()
+
+    deleted = await BookService().delete_books(
+        [books[0].uid, books[1].uid, uuid.uuid4()], session
+    )
+
+    counts = [
+        (await session.exec(select(func.count()).select_from(model))).one()
+        for model in (Book, Review, BookTag, Tag)
+    ]
+
+    assert deleted == [books[0].uid, books[1].uid]
+    assert counts == [1, 1, 1, 1]
+    # Cached copies of the deleted reviews are dropped too.
+    invalidated = {uid for call in invalidate_reviews.await_args_list for uid in call.args}
+    assert invalidated == {str(reviews[0].uid), str(reviews[1].uid)}
+
+
+@pytest.mark.asyncio
+async def test_review_stats_are_maintained_and_reconciled(session, make_book, monkeypatch):
+    from src.books.schemas import BookSort
+    from src.books.service import BookService
+    from src.database.models import Review
+
+    monkeypatch.setattr("src.books.service.book_cache.invalidate", AsyncMock())
+
+    books = [make_book(title=f"Book {i}") for i in range(2)]
+    session.add_all(books)
+    await session.commit()
+
+    service = BookService()
+    await service.apply_review_stats(books[0].uid, 1, 4, session)
+    await service.apply_review_stats(books[0].uid, 1, 2, session)
+    await service.apply_review_stats(books[1].uid, 1, 1, session)
+    await session.commit()
+    session.expire_all()
+
+    by_rating, _ = await service.get_all_books(session, 10, sort=BookSort.RATING)
+    ranked = [(book.uid, book.review_count, book.avg_rating) for book in by_rating]
+
+    # Only the first book's reviews actually exist.
+    session.add(Review(rating=4, review_text="Good", book_uid=books[0].uid))
+    session.add(Review(rating=2, review_text="Fine", book_uid=books[0].uid))
+    await session.commit()
+    repaired = await service.reconcile_review_stats(session)
+    again = await service.reconcile_review_stats(session)
+
+    assert ranked == [(books[0].uid, 2, 3.0), (books[1].uid, 1, 1.0)]
+    assert repaired == [books[1].uid]
+    assert again == []
+
+
+def test_leaderboard_materializes_windows_from_daily_buckets():
+    import asyncio
+    import uuid
+
+    from src.books.leaderboard import Leaderboard
+    from src.books.schemas import LeaderboardBy, LeaderboardWindow
+
+    book_uid = uuid.uuid4()
+    pipe = MagicMock(execute=AsyncMock())
+    redis_client = MagicMock(
+        exists=AsyncMock(return_value=0),
+        zrevrange=AsyncMock(return_value=[(str(book_uid).encode(), 4.5)]),
+    )
+    redis_client.pipeline.return_value.__aenter__.return_value = pipe
+
+    with patch("src.database.redis.redis_client", new=redis_client):
+        ranked = asyncio.run(
+            Leaderboard().top(LeaderboardBy.RATING, LeaderboardWindow.WEEK, 3)
+        )
+
+    assert ranked == [(book_uid, 4.5)]
+    key, buckets = pipe.zunionstore.call_args.args
+    assert key == "leaderboard:reviews:7d" and len(buckets) == 7
+    pipe.zinterstore.assert_called_once_with(
+        "leaderboard:rating:7d",
+        {"leaderboard:rating": 1, "leaderboard:reviews:7d": 0},
+    )
+    redis_client.zrevrange.assert_awaited_once_with(
+        "leaderboard:rating:7d", 0, 2, withscores=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_facets_count_values_under_the_current_filter(session, make_book):
+    from datetime import date
+
+    from src.books.schemas import BookFilterModel
+    from src.books.service import BookService
+    from src.database.models import BookTag, Tag
+
+    tag = Tag(name="classic")
+    books = [
+        make_book(
+            title=f"Book {i}",
+            author=author,
+            published_date=date(2000 + i, 1, 1),
+            page_count=100 * (i + 1),
+            language=language,
+        )
+        for i, (author, language) in enumerate(
+            [("Tolkien", "en"), ("Tolkien", "en"), ("Hugo", "fr"), ("Verne", "fr")]
+        )
+    ]
+    session.add_all([tag, *books])
+    await session.flush()
+    session.add(BookTag(book_id=books[0].uid, tag_id=tag.uid))
+    await session.commit()
+
+    service = BookService()
+    everything = await service._count_facets(BookFilterModel(), 10, session)
+    filtered = await service._count_facets(
+        BookFilterModel(min_pages=200, published_to=date(2002, 1, 1)), 10, session
+    )
+    tagged, _ = await service.get_all_books(
+        session, 10, filters=BookFilterModel(tag="classic")
+    )
+
+    assert everything["total"] == 4
+    assert everything["author"] == [
+        {"value": "Tolkien", "count": 2},
+        {"value": "Hugo", "count": 1},
+        {"value": "Verne", "count": 1},
+    ]
+    assert everything["tag"] == [{"value": "classic", "count": 1}]
+    assert filtered["total"] == 2
+    assert filtered["language"] == [
+        {"value": "en", "count": 1},
+        {"value": "fr", "count": 1},
+    ]
+    assert filtered["tag"] == []
+    assert [book.uid for book in tagged] == [books[0].uid]
+
+
+def test_similar_books_rank_by_tag_cosine():
+    import numpy as np
+
+    from src.books.similar import compute_neighbours, weighted_matrix
+
+    # Books 0 and 1 share both tags, book 2 shares one, book 3 none.
+    books = np.array([0, 0, 1, 1, 2, 3])
+    tags = np.array([0, 1, 0, 1, 1, 2])
+    matrix = weighted_matrix(books, tags, (4, 3), np.bincount(tags), 4)
+
+    rows, columns, scores, ranks = compute_neighbours(matrix, 1)
+
+    neighbours = dict(zip(rows.tolist(), columns.tolist()))
+    assert neighbours[0] == 1 and neighbours[1] == 0
+    # Books 0 and 1 are identical, so either is book 2's nearest neighbour.
+    assert neighbours[2] in (0, 1) and 3 not in neighbours
+    assert np.isclose(scores[0], 1.0)
+    assert ranks.tolist() == [0, 0, 0]
+
+
+@pytest.mark.asyncio
+async def test_similarities_rebuild_then_update_one_book(session, make_book):
+    import uuid
+
+    from sqlmodel import select
+
+    from src.books.similar import rebuild_similarities, update_similarities
+    from src.database.models import BookSimilarity, BookTag, Tag
+
+    books = [make_book(title=f"Book {i}") for i in range(4)]
+    fantasy, epic, cooking = (
+        Tag(uid=uuid.uuid4(), name=name) for name in ("fantasy", "epic", "cooking")
+    )
+    session.add_all([*books, fantasy, epic, cooking])
+    await session.flush()
+    for book, tag in [
+        (books[0], fantasy),
+        (books[0], epic),
+        (books[1], fantasy),
+        (books[1], epic),
+        (books[2], epic),
+        (books[3], cooking),
+    ]:
+        session.add(BookTag(book_id=book.uid, tag_id=tag.uid))
+    await session.commit()
+
+    async def neighbours(book):
+        result = await session.exec(
+            select(BookSimilarity.similar_uid)
+            .where(BookSimilarity.book_uid == book.uid)
+            .order_by(BookSimilarity.rank)
+        )
+        return result.all()
+
+    assert await rebuild_similarities(session) == 6
+    assert await neighbours(books[0]) == [books[1].uid, books[2].uid]
+    assert await neighbours(books[3]) == []
+
+    session.add(BookTag(book_id=books[3].uid, tag_id=fantasy.uid))
+    await session.commit()
+
+    assert await update_similarities(books[3].uid, session) == 2
+    assert set(await neighbours(books[3])) == {books[0].uid, books[1].uid}
+    # Other books' lists wait for the next full rebuild.
+    assert await neighbours(books[0]) == [books[1].uid, books[2].uid]
+
+
+@pytest.mark.asyncio
+async def test_search_books_ranks_sqlite_fts5_matches(session, make_book):
+    from src.books.search import _create_search_index
+    from src.books.service import BookService
+
+    await _create_search_index(await session.connection())
+    for title, author in [
+        ("The Hobbit", "J.R.R. Tolkien"),
+        ("Tolkien: A Biography", "Humphrey Carpenter"),
+        ("Dune", "Frank Herbert"),
+    ]:
+        session.add(make_book(title=title, author=author))
+    await session.commit()
+
+    books, next_cursor = await BookService().search_books("tolk", session, limit=1)
+    more, _ = await BookService().search_books(
+        "tolk", session, limit=1, cursor=next_cursor
+    )
+
+    assert [book.title for book in books] == ["Tolkien: A Biography"]
+    assert [book.title for book in more] == ["The Hobbit"]
+
+
+def test_prefix_index_updates_incrementally():
+    import uuid
+
+    from src.books.suggest import PrefixIndex
+
+    index = PrefixIndex()
+    hobbit, rings = uuid.uuid4(), uuid.uuid4()
+    index.add(hobbit, "The Hobbit", "J.R.R. Tolkien")
+    index.add(rings, "The Lord of the Rings", "J.R.R. Tolkien")
+
+    assert [s["text"] for s in index.suggest("the", 10)] == [
+        "The Hobbit",
+        "The Lord of the Rings",
+    ]
+    assert index.suggest("j.r.r", 10) == [
+        {"text": "J.R.R. Tolkien", "kind": "author", "book_uid": None}
+    ]
+
+    index.add(hobbit, "Der Hobbit", "J.R.R. Tolkien")
+    index.remove(rings)
+
+    assert [s["text"] for s in index.suggest("the", 10)] == []
+    assert [s["text"] for s in index.suggest("DER", 10)] == ["Der Hobbit"]
+    assert len(index) == 2
+
+
+def test_prefix_index_batches_match_single_updates():
+    import uuid
+
+    from src.books.suggest import PrefixIndex
+
+    uids = [uuid.uuid4() for _ in range(4)]
+    books = [
+        (uids[0], "The Hobbit", "J.R.R. Tolkien"),
+        (uids[1], "Dune", "Frank Herbert"),
+        (uids[2], "The Silmarillion", "J.R.R. Tolkien"),
+        # Renamed within the same batch.
+        (uids[1], "Dune Messiah", "Frank Herbert"),
+        (uids[3], "Emma", "Jane Austen"),
+    ]
+
+    single, batched = PrefixIndex(), PrefixIndex()
+    for book in books:
+        single.add(*book)
+    batched.add_many(books)
+    assert batched._keys == single._keys
+
+    for uid in uids[:2]:
+        single.remove(uid)
+    batched.remove_many(uids[:2])
+    batched.add_many([(uids[0], "The Hobbit", "J.R.R. Tolkien")])
+    single.add(uids[0], "The Hobbit", "J.R.R. Tolkien")
+
+    assert batched._keys == single._keys
+    assert batched._bytes == single._bytes
+    assert [s["text"] for s in batched.suggest("frank", 10)] == []
+    assert [s["text"] for s in batched.suggest("j.r.r", 10)] == ["J.R.R. Tolkien"]
+
+
+def test_if_none_match_uses_weak_comparison():
+    from starlette.requests import Request
+
+    from src.etag import is_not_modified
+
+    def request(header):
+        return Request(
+            {"type": "http", "headers": [(b"if-none-match", header.encode())]}
+        )
+
+    assert is_not_modified(request('"a", W/"7"'), '"7"')
+    assert is_not_modified(request("*"), '"7"')
+    assert not is_not_modified(request('"6"'), '"7"')
+
+
+def test_if_match_uses_strong_comparison():
+    from starlette.requests import Request
+
+    from src.etag import if_match_versions
+
+    def request(header=None):
+        headers = [(b"if-match", header.encode())] if header is not None else []
+        return Request({"type": "http", "headers": headers})
+
+    assert if_match_versions(request()) is None
+    assert if_match_versions(request("*")) is None
+    assert if_match_versions(request('"3", "4"')) == [3, 4]
+    assert if_match_versions(request('"5.9f2c"')) == [5]
+    assert if_match_versions(request('W/"3", "abc"')) == []
+
+
+@pytest.mark.asyncio
+async def test_tag_changes_feed_book_etags_without_bumping_books(
+    session, make_book, monkeypatch
+):
+    from src.books.routes import BookExpansion
+    from src.books.schemas import BookModel
+    from src.books.service import BookService
+    from src.database.models import BookTag, Tag
+    from src.tags.schemas import TagCreateModel, TagModel
+    from src.tags.service import TagService
+
+    tags_cache = {}
+
+    async def get_or_load(key, loader):
+        if key not in tags_cache:
+            tags_cache[key] = [
+                TagModel.model_validate(tag, from_attributes=True)
+                for tag in await loader()
+            ]
+        return tags_cache[key]
+
+    async def invalidate(*keys):
+        for key in keys:
+            tags_cache.pop(key, None)
+
+    monkeypatch.setattr("src.tags.service.tags_cache.get_or_load", get_or_load)
+    monkeypatch.setattr("src.tags.service.tags_cache.invalidate", invalidate)
+
+    book = make_book()
+    tags = [Tag(name="classic"), Tag(name="fantasy")]
+    session.add_all([book, *tags])
+    await session.flush()
+    session.add_all([BookTag(book_id=book.uid, tag_id=tag.uid) for tag in tags])
+    await session.commit()
+    await session.refresh(book)
+    cached = BookModel.model_validate(book, from_attributes=True)
+
+    books, tag_service = BookService(), TagService()
+    summary = BookExpansion(include=None, reviews_limit=5, tags_limit=10)
+    expanded = BookExpansion(include="tags", reviews_limit=5, tags_limit=10)
+
+    async def etags():
+        return (
+            await summary.page_etag([book], None, session),
+            await expanded.page_etag([book], None, session),
+            await books.get_book_etag(str(book.uid), session),
+        )
+
+    before = await etags()
+    await tag_service.update_tag(str(tags[0].uid), TagCreateModel(name="Classic"), session)
+    renamed = await etags()
+    current = await tag_service.with_current_tags(cached, session)
+    await tag_service.delete_tag(str(tags[1].uid), session)
+    deleted = await etags()
+    remaining = await tag_service.with_current_tags(cached, session)
+
+    assert renamed[0] == before[0] and renamed[1:] != before[1:]
+    assert deleted[0] == before[0] and len({before[2], renamed[2], deleted[2]}) == 3
+    assert before[2].startswith(f'"{book.version}.')
+    assert await books.get_book_version(str(book.uid), session) == book.version
+    assert sorted(tag.name for tag in current.tags) == ["Classic", "fantasy"]
+    assert [tag.name for tag in remaining.tags] == ["Classic"]
+    assert sorted(tag.name for tag in cached.tags) == ["classic", "fantasy"]
+
+
+@pytest.mark.asyncio
+async def test_rating_counts_follow_reviews_and_rebuild_to_the_same_histogram(
+    session, make_book, monkeypatch
+):
+    import uuid
+
+    from sqlmodel import select
+
+    from src.books.ratings import get_rating_histogram, rebuild_rating_counts
+    from src.database.models import BookRatingCount, Review, User
+    from src.reviews.schemas import ReviewCreateModel
+    from src.reviews.service import ReviewService
+
+    monkeypatch.setattr("src.reviews.service.book_cache.invalidate", AsyncMock())
+    monkeypatch.setattr("src.reviews.service.review_cache.invalidate", AsyncMock())
+    monkeypatch.setattr("src.reviews.service.leaderboard.record", AsyncMock())
+
+    book = make_book()
+    user = User(
+        username="reader",
+        email="reader@example.com",
+        first_name="Read",
+        last_name="Er",
+        password_hash="x",  # noqa: S106
+    )
+    session.add_all([book, user])
+    await session.commit()
+
+    service = ReviewService()
+    for rating in (5, 4, 4, 2, 1):
+        await service.add_review_to_book(
+            user.uid,
+            str(book.uid),
+            ReviewCreateModel(rating=rating, review_text="text"),
+            session,
+        )
+    review = (await session.exec(select(Review).where(Review.rating == 1))).one()
+    await service.delete_review_to_form_book(review.uid, user.email, session)
+
+    incremental = await get_rating_histogram(str(book.uid), session)
+    await rebuild_rating_counts(session)
+    rebuilt = await get_rating_histogram(str(book.uid), session)
+    stored = (await session.exec(select(BookRatingCount))).all()
+    missing = await get_rating_histogram(str(uuid.uuid4()), session)
+
+    assert incremental["total"] == 4 and incremental["average"] == 3.75
+    assert {c["rating"]: c["count"] for c in incremental["counts"]} == {
+        0: 0, 1: 0, 2: 1, 3: 0, 4: 2, 5: 1
+    }
+    assert incremental["percentiles"] == {"p25": 2, "p50": 4, "p75": 4, "p90": 5}
+    assert rebuilt == incremental
+    assert len(stored) == 3
+    assert missing is None
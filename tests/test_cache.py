@@ -0,0 +1,76 @@
+import asyncio
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from redis.exceptions import ConnectionError
+
+from src.cache import MISSING, LocalCache, TwoTierCache
+from src.tags.schemas import TagCreateModel
+
+
+def test_local_cache_evicts_least_recently_used():
+    cache = LocalCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is MISSING
+    assert cache.get("c") == 3
+
+
+def test_local_cache_expires_entries():
+    cache = LocalCache(maxsize=2, ttl=-1)
+    cache.set("a", 1)
+
+    assert cache.get("a") is MISSING
+
+
+def test_two_tier_cache_loads_once_and_invalidates():
+    redis_client = MagicMock(
+        get=AsyncMock(return_value=None), set=AsyncMock(), delete=AsyncMock()
+    )
+    cache = TwoTierCache("test", TagCreateModel)
+    loader = AsyncMock(return_value={"name": "fiction"})
+
+    async def scenario():
+        first = await cache.get_or_load("k", loader)
+        second = await cache.get_or_load("k", loader)
+        await cache.invalidate("k")
+        third = await cache.get_or_load("k", loader)
+        return first, second, third
+
+    with patch("src.database.redis.redis_client", new=redis_client):
+        first, second, third = asyncio.run(scenario())
+
+    assert first == second == third == TagCreateModel(name="fiction")
+    assert loader.await_count == 2
+    redis_client.set.assert_awaited()
+    redis_client.delete.assert_awaited_once_with("cache:test:k")
+
+
+def test_two_tier_cache_reads_through_redis():
+    redis_client = MagicMock(get=AsyncMock(return_value=b'{"name":"fiction"}'))
+    cache = TwoTierCache("test", TagCreateModel)
+    loader = AsyncMock()
+
+    with patch("src.database.redis.redis_client", new=redis_client):
+        value = asyncio.run(cache.get_or_load("k", loader))
+
+    assert value == TagCreateModel(name="fiction")
+    loader.assert_not_awaited()
+
+
+def test_two_tier_cache_survives_redis_outage():
+    redis_client = MagicMock(
+        get=AsyncMock(side_effect=ConnectionError()),
+        set=AsyncMock(side_effect=ConnectionError()),
+    )
+    cache = TwoTierCache("test", TagCreateModel)
+
+    with patch("src.database.redis.redis_client", new=redis_client):
+        value = asyncio.run(
+            cache.get_or_load("k", AsyncMock(return_value={"name": "fiction"}))
+        )
+
+    assert value == TagCreateModel(name="fiction")
@@ -28,7 +28,9 @@ def override_dependencies():
     app.dependency_overrides[get_session] = fake_get_session
     with patch(
         "src.database.redis.token_block_list",
-        new=MagicMock(get=AsyncMock(return_value=None)),
+        new=MagicMock(
+            get=AsyncMock(return_value=None), mget=AsyncMock(return_value=[None, None])
+        ),
     ), patch("src.database.redis.add_jti_to_block_list", new=AsyncMock()), patch(
         "src.database.redis.token_in_blocklist", new=AsyncMock(return_value=False)
     ), patch(
@@ -64,7 +66,7 @@ def mock_get_reviews_success(monkeypatch):
         pass
 
     monkeypatch.setattr(
-        ReviewService, "get_all_reviews", AsyncMock(return_value=[FakeReview()])
+        ReviewService, "get_all_reviews", AsyncMock(return_value=([FakeReview()], None))
     )
     yield
 
@@ -110,3 +112,176 @@ def test_delete_review_authenticated(auth_token, monkeypatch):
         headers={"Authorization": f"Bearer {auth_token}"},
     )
     assert resp.status_code in (204, 404)
+
+
+@pytest.mark.asyncio
+async def test_book_reviews_are_paged_and_filtered_by_rating(session, make_book):
+    from datetime import datetime, timedelta
+
+    from src.database.models import Review
+    from src.errors import BookNotFoundError
+    from src.reviews.service import ReviewService
+
+    books = [make_book(title=f"Book {i}") for i in range(2)]
+    session.add_all(books)
+    await session.flush()
+    now = datetime.now()
+    reviews = [
+        Review(
+            rating=rating,
+            review_text="text",
+            book_uid=books[0].uid,
+            created_at=now - timedelta(minutes=i),
+        )
+        for i, rating in enumerate([4, 1, 3, 4])
+    ]
+    session.add_all(
+        [*reviews, Review(rating=4, review_text="other", book_uid=books[1].uid)]
+    )
+    await session.commit()
+
+    service = ReviewService()
+    first, cursor = await service.get_book_reviews(
+        str(books[0].uid), session, 2, min_rating=3
+    )
+    rest, end = await service.get_book_reviews(
+        str(books[0].uid), session, 2, cursor, min_rating=3
+    )
+    with pytest.raises(BookNotFoundError):
+        await service.get_book_reviews("not-a-uuid", session, 2)
+
+    assert [review.uid for review in first + rest] == [
+        reviews[0].uid,
+        reviews[2].uid,
+        reviews[3].uid,
+    ]
+    assert end is None
+
+
+@pytest.mark.asyncio
+async def test_add_review_updates_stats_without_loading_the_book(
+    session, make_book, monkeypatch
+):
+    import uuid
+
+    from sqlmodel import func, select
+
+    from src.database.models import Book, Review
+    from src.errors import BookNotFoundError
+    from src.reviews.schemas import ReviewCreateModel
+    from src.reviews.service import ReviewService
+
+    invalidate = AsyncMock()
+    monkeypatch.setattr("src.reviews.service.book_cache.invalidate", invalidate)
+    record = AsyncMock()
+    monkeypatch.setattr("src.reviews.service.leaderboard.record", record)
+
+    book = make_book()
+    session.add(book)
+    await session.commit()
+
+    service = ReviewService()
+    user_uid = uuid.uuid4()
+    review = await service.add_review_to_book(
+        user_uid, str(book.uid), ReviewCreateModel(rating=4, review_text="Good"), session
+    )
+    await service.add_review_to_book(
+        user_uid, book.uid.hex.upper(), ReviewCreateModel(rating=1, review_text="Meh"), session
+    )
+    with pytest.raises(BookNotFoundError):
+        await service.add_review_to_book(
+            user_uid, str(uuid.uuid4()), ReviewCreateModel(rating=3, review_text="?"), session
+        )
+
+    session.expire_all()
+    stored = (await session.exec(select(Book))).one()
+    reviews = (await session.exec(select(func.count(Review.uid)))).one()
+
+    assert review["book_uid"] == book.uid and review["rating"] == 4
+    assert (stored.review_count, stored.avg_rating, stored.version) == (2, 2.5, 3)
+    assert reviews == 2
+    assert record.await_args.args[1:3] == (2, 2.5)
+    invalidate.assert_awaited_with(str(book.uid))
+
+
+@pytest.mark.asyncio
+async def test_add_review_on_postgres_is_one_statement_of_ctes(monkeypatch):
+    import uuid
+
+    from sqlalchemy.dialects import postgresql
+
+    from src.reviews.schemas import ReviewCreateModel
+    from src.reviews.service import ReviewService
+
+    monkeypatch.setattr("src.reviews.service.book_cache.invalidate", AsyncMock())
+    monkeypatch.setattr("src.reviews.service.leaderboard.record", AsyncMock())
+    row = {"uid": uuid.uuid4(), "review_count": 1, "avg_rating": 4.0}
+    result = MagicMock()
+    result.mappings.return_value.one.return_value = row
+    session = MagicMock(exec=AsyncMock(return_value=result), commit=AsyncMock())
+    session.bind.dialect.name = "postgresql"
+
+    await ReviewService().add_review_to_book(
+        uuid.uuid4(), str(uuid.uuid4()), ReviewCreateModel(rating=4, review_text="Good"), session
+    )
+
+    session.exec.assert_awaited_once()
+    sql = str(session.exec.await_args.args[0].compile(dialect=postgresql.dialect()))
+    # The book's stats, the review and the rating count are written together.
+    assert sql.startswith("WITH ")
+    assert "stats AS \n(UPDATE books SET" in sql
+    assert "inserted AS \n(INSERT INTO reviews" in sql
+    assert "counts AS \n(INSERT INTO book_rating_counts" in sql
+    assert "ON CONFLICT (book_uid, rating) DO UPDATE" in sql
+    assert sql.count("RETURNING") == 2
+    assert sql.rstrip().endswith("FROM inserted JOIN stats ON true")
+
+
+@pytest.mark.asyncio
+async def test_bulk_reviews_report_row_failures_and_update_each_book_once(
+    session, make_book, monkeypatch
+):
+    import uuid
+
+    from sqlmodel import func, select
+
+    from src.books.ratings import get_rating_histogram
+    from src.database.models import Book, Review
+    from src.reviews.service import ReviewService
+
+    monkeypatch.setattr("src.reviews.service.book_cache.invalidate", AsyncMock())
+    record = AsyncMock()
+    monkeypatch.setattr("src.reviews.service.leaderboard.record", record)
+
+    books = [make_book(title=f"Book {i}") for i in range(2)]
+    session.add_all(books)
+    await session.commit()
+
+    first, second = (str(book.uid) for book in books)
+    rows = [
+        {"book_uid": first, "rating": 5, "review_text": "Great"},
+        {"book_uid": first, "rating": 3, "review_text": "Fine"},
+        {"book_uid": second, "rating": 9, "review_text": "Too high"},
+        {"book_uid": str(uuid.uuid4()), "rating": 4, "review_text": "Lost"},
+        {"book_uid": second, "rating": 2, "review_text": "Weak"},
+        {"book_uid": first, "rating": 4, "review_text": "Good"},
+    ]
+    report = await ReviewService().add_reviews(
+        uuid.uuid4(), rows, session, chunk_size=2, max_errors=10
+    )
+
+    session.expire_all()
+    stored = {
+        str(book.uid): (book.review_count, book.avg_rating)
+        for book in (await session.exec(select(Book))).all()
+    }
+    reviews = (await session.exec(select(func.count(Review.uid)))).one()
+    ratings = await get_rating_histogram(first, session)
+
+    assert (report["inserted"], report["failed"]) == (4, 2)
+    assert [error["index"] for error in report["errors"]] == [2, 3]
+    assert report["errors"][1]["errors"][0]["loc"] == ["book_uid"]
+    assert stored == {first: (3, 4.0), second: (1, 2.0)}
+    assert reviews == 4
+    assert [c["count"] for c in ratings["counts"]] == [0, 0, 0, 1, 1, 1]
+    assert sorted(call.args[4] for call in record.await_args_list) == [1, 3]
@@ -28,7 +28,9 @@ def override_dependencies():
     app.dependency_overrides[get_session] = fake_get_session
     with patch(
         "src.database.redis.token_block_list",
-        new=MagicMock(get=AsyncMock(return_value=None)),
+        new=MagicMock(
+            get=AsyncMock(return_value=None), mget=AsyncMock(return_value=[None, None])
+        ),
     ), patch("src.database.redis.add_jti_to_block_list", new=AsyncMock()), patch(
         "src.database.redis.token_in_blocklist", new=AsyncMock(return_value=False)
     ), patch(
@@ -122,3 +124,99 @@ def test_add_tag_to_book_authenticated(auth_token, monkeypatch):
         headers={"Authorization": f"Bearer {auth_token}"},
     )
     assert resp.status_code in (200, 404)
+
+
+def test_get_tag_books_authenticated(auth_token, monkeypatch):
+    monkeypatch.setattr(
+        "src.tags.service.TagService.get_tag_books",
+        AsyncMock(return_value=([], None)),
+    )
+    resp = client.get(
+        "/api/v1/tags/fake-tag-uid/books",
+        headers={"Authorization": f"Bearer {auth_token}"},
+    )
+    assert resp.status_code in (200, 404)
+
+
+@pytest.mark.asyncio
+async def test_get_tag_books_pages_through_booktag(session, make_book):
+    from sqlmodel import select
+
+    from src.database.models import BookTag, Tag
+    from src.tags.service import TagService
+
+    tag = Tag(name="fiction")
+    books = [make_book(title=f"Book {i}") for i in range(3)]
+    session.add_all([tag, *books])
+    await session.flush()
+    for book in books[:2]:
+        session.add(BookTag(book_id=book.uid, tag_id=tag.uid))
+    await session.commit()
+    session.expunge_all()
+
+    loaded = (await session.exec(select(Tag))).one()
+    first, cursor = await TagService().get_tag_books(str(tag.uid), session, 1)
+    rest, end = await TagService().get_tag_books(str(tag.uid), session, 1, cursor)
+
+    assert loaded.books == []
+    assert {book.uid for book in first + rest} == {books[0].uid, books[1].uid}
+    assert end is None
+
+
+@pytest.mark.asyncio
+async def test_add_tag_to_book_queues_similarities_after_the_response(monkeypatch):
+    import uuid
+
+    from fastapi import BackgroundTasks
+
+    from src.tags.routes import add_tag_to_book
+    from src.tags.schemas import TagAddModel
+
+    book = MagicMock(uid=uuid.uuid4())
+    monkeypatch.setattr(
+        "src.tags.service.TagService.add_tag_to_book", AsyncMock(return_value=book)
+    )
+    update_book_similarities = MagicMock()
+    monkeypatch.setattr(
+        "src.tags.routes.update_book_similarities", update_book_similarities
+    )
+    background_tasks = BackgroundTasks()
+
+    await add_tag_to_book(
+        TagAddModel(tags=[]), str(book.uid), background_tasks, MagicMock()
+    )
+
+    update_book_similarities.delay.assert_not_called()
+    await background_tasks()
+    update_book_similarities.delay.assert_called_once_with(str(book.uid))
+
+
+@pytest.mark.asyncio
+async def test_add_tag_to_book_adds_every_tag_once(session, make_book, monkeypatch):
+    from src.database.models import Tag
+    from src.tags.schemas import TagAddModel
+    from src.tags.service import TagService
+
+    monkeypatch.setattr("src.tags.service.tags_cache.invalidate", AsyncMock())
+    invalidate_book = AsyncMock()
+    monkeypatch.setattr("src.tags.service.book_cache.invalidate", invalidate_book)
+    book = make_book()
+    session.add_all([book, Tag(name="fantasy")])
+    await session.commit()
+
+    tagged = await TagService().add_tag_to_book(
+        str(book.uid),
+        TagAddModel.model_validate(
+            {"tags": [{"name": "fantasy"}, {"name": "epic"}, {"name": "epic"}]}
+        ),
+        session,
+    )
+    again = await TagService().add_tag_to_book(
+        str(book.uid), TagAddModel.model_validate({"tags": [{"name": "epic"}]}), session
+    )
+
+    assert sorted(tag.name for tag in tagged.tags) == ["epic", "fantasy"]
+    assert len(again.tags) == 2
+    # Nothing new the second time, so no second version bump.
+    assert again.version == 2
+    invalidate_book.assert_awaited_with(str(book.uid))